@@ -0,0 +1,85 @@
+import argparse
+import json
+import random
+from typing import Iterator
+
+# share of generated rows missing one of their keys, like tests/test_data/incomplete.json
+DEFAULT_INCOMPLETE_RATE = 0.01
+# share of generated rows with a string height/weight or a zero height
+DEFAULT_INVALID_RATE = 0.005
+# share of ndjson lines that are cut short, json arrays can not hold a corrupted row without failing as a whole
+DEFAULT_CORRUPTED_RATE = 0.001
+
+# mean and standard deviation of the height in cm per gender
+HEIGHT_DISTRIBUTION = {'Male': (176, 7), 'Female': (163, 6.5)}
+BMI_DISTRIBUTION = (26.5, 5)
+
+
+def iter_people(count: int, seed: int = 0, incomplete_rate: float = DEFAULT_INCOMPLETE_RATE,
+                invalid_rate: float = DEFAULT_INVALID_RATE) -> Iterator[dict]:
+    """Yields count realistic records, the same ones for the same seed"""
+    generator = random.Random(seed)
+    for _ in range(count):
+        gender = 'Male' if generator.random() < 0.5 else 'Female'
+        height = max(round(generator.gauss(*HEIGHT_DISTRIBUTION[gender])), 50)
+        bmi_value = max(generator.gauss(*BMI_DISTRIBUTION), 12)
+        weight = round(bmi_value * (height / 100) ** 2)
+        person_data = {'Gender': gender, 'HeightCm': height, 'WeightKg': weight}
+
+        draw = generator.random()
+        if draw < incomplete_rate:
+            del person_data[generator.choice(['Gender', 'HeightCm', 'WeightKg'])]
+        elif draw < incomplete_rate + invalid_rate:
+            defect = generator.randrange(3)
+            if defect == 0:
+                person_data['HeightCm'] = str(height)
+            elif defect == 1:
+                person_data['WeightKg'] = str(weight)
+            else:
+                person_data['HeightCm'] = 0
+        yield person_data
+
+
+def write_data_file(data_file_src: str, count: int, seed: int = 0, data_format: str = 'json',
+                    incomplete_rate: float = DEFAULT_INCOMPLETE_RATE, invalid_rate: float = DEFAULT_INVALID_RATE,
+                    corrupted_rate: float = DEFAULT_CORRUPTED_RATE) -> None:
+    """Streams count generated records to a json array, ndjson or csv file without holding them in memory"""
+    people = iter_people(count, seed, incomplete_rate, invalid_rate)
+    corruption = random.Random(seed + 1)
+
+    with open(data_file_src, 'w', buffering=1024 * 1024) as file:
+        if data_format == 'json':
+            file.write('[')
+            for index, person_data in enumerate(people):
+                file.write(',\n' if index else '\n')
+                file.write(json.dumps(person_data))
+            file.write('\n]\n')
+        elif data_format == 'ndjson':
+            for person_data in people:
+                line = json.dumps(person_data)
+                if corruption.random() < corrupted_rate:
+                    line = line[:len(line) // 2]
+                file.write(line + '\n')
+        elif data_format == 'csv':
+            file.write('Gender,HeightCm,WeightKg\n')
+            for person_data in people:
+                file.write(f"{person_data.get('Gender', '')},{person_data.get('HeightCm', '')},"
+                           f"{person_data.get('WeightKg', '')}\n")
+        else:
+            raise ValueError(f'Unknown format {data_format}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generates seeded BMI data files for benchmarking')
+    parser.add_argument('output', help='path of the data file to write')
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', dest='data_format', choices=['json', 'ndjson', 'csv'], default='json')
+    parser.add_argument('--incomplete-rate', type=float, default=DEFAULT_INCOMPLETE_RATE)
+    parser.add_argument('--invalid-rate', type=float, default=DEFAULT_INVALID_RATE)
+    parser.add_argument('--corrupted-rate', type=float, default=DEFAULT_CORRUPTED_RATE,
+                        help='share of truncated lines, only used for ndjson')
+    args = parser.parse_args()
+
+    write_data_file(args.output, args.records, args.seed, args.data_format, args.incomplete_rate, args.invalid_rate,
+                    args.corrupted_rate)
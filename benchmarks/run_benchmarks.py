@@ -0,0 +1,153 @@
+"""Throughput and peak memory benchmarks, run from the project root with python -m benchmarks.run_benchmarks"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from benchmarks.generate_data import iter_people, write_data_file
+from main import BMICalculator, DataProcessor
+
+DEFAULT_SIZES = (1000, 100000)
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_BASELINE_SRC = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# the calculator benchmarks loop over a sample of at most this many people instead of holding every size in memory
+MAX_SAMPLE_SIZE = 100000
+
+
+def _measure(fn: Callable[[], None], records: int, repeat: int, trace_memory: bool) -> dict:
+    """Runs fn repeat times and returns the best throughput, plus the peak traced memory of one extra run"""
+    best_seconds = float('inf')
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best_seconds = min(best_seconds, time.perf_counter() - start)
+
+        result = {'records': records, 'seconds': best_seconds, 'records_per_second': records / best_seconds}
+        if trace_memory:
+            tracemalloc.start()
+            try:
+                fn()
+                result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return result
+
+
+def _passes(sample: Sequence, size: int) -> Iterator[Sequence]:
+    """Yields the sample, then a slice of it, as many times as it takes to cover size items"""
+    full_passes, rest = divmod(size, len(sample))
+    for _ in range(full_passes):
+        yield sample
+    if rest:
+        yield sample[:rest]
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed: int = 0, repeat: int = 3, work_dir: Optional[str] = None) -> dict:
+    """Benchmarks the calculator and the data processor on seeded data of every size, keyed by name and size"""
+    bmi_calculator = BMICalculator()
+    benchmarks = {}
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+        for size in sizes:
+            sample_size = max(1, min(size, MAX_SAMPLE_SIZE))
+            measurements = [(person_data['WeightKg'], person_data['HeightCm'])
+                            for person_data in iter_people(sample_size, seed, incomplete_rate=0, invalid_rate=0)]
+            bmi_values = [bmi_calculator.calculate(weight, height) for weight, height in measurements]
+
+            def calculate():
+                for sample in _passes(measurements, size):
+                    for weight, height in sample:
+                        bmi_calculator.calculate(weight, height)
+
+            def category():
+                for sample in _passes(bmi_values, size):
+                    for bmi_value in sample:
+                        bmi_calculator.category(bmi_value)
+
+            def health_risk():
+                for sample in _passes(bmi_values, size):
+                    for bmi_value in sample:
+                        bmi_calculator.health_risk(bmi_value)
+
+            data_file_src = os.path.join(temp_dir, f'data_{size}.json')
+            write_data_file(data_file_src, size, seed)
+
+            def process_data():
+                DataProcessor.process_data(data_file_src)
+
+            def iter_records():
+                for _ in DataProcessor.iter_records(data_file_src):
+                    pass
+
+            for name, fn, trace_memory in [('calculate', calculate, False), ('category', category, False),
+                                           ('health_risk', health_risk, False), ('process_data', process_data, True),
+                                           ('iter_records', iter_records, True)]:
+                benchmarks[f'{name}[{size}]'] = _measure(fn, size, repeat, trace_memory)
+            os.remove(data_file_src)
+
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'seed': seed,
+            'benchmarks': benchmarks}
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Returns a description of every benchmark whose throughput dropped, or whose peak memory grew, by more than
+    tolerance compared with the baseline. Benchmarks missing from either side are not compared."""
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        baseline_result: Dict = baseline['benchmarks'].get(name)
+        if baseline_result is None:
+            continue
+
+        if result['records_per_second'] < baseline_result['records_per_second'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['records_per_second']:.0f}/s is below the baseline "
+                               f"{baseline_result['records_per_second']:.0f}/s")
+        if 'peak_memory_bytes' in result and 'peak_memory_bytes' in baseline_result and \
+                result['peak_memory_bytes'] > baseline_result['peak_memory_bytes'] * (1 + tolerance):
+            regressions.append(f"{name}: peak memory {result['peak_memory_bytes']} bytes is above the baseline "
+                               f"{baseline_result['peak_memory_bytes']} bytes")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs the benchmarks and compares them with a stored baseline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='number of records to benchmark with, e.g. 1000 100000 100000000')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--work-dir', help='directory for the generated data files, defaults to the system temp dir')
+    parser.add_argument('--output', default='bench_output.json', help='path of the json results')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_SRC)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed relative drop in throughput or growth in peak memory')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the results as the new baseline, without it a missing baseline is an error')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.seed, args.repeat, args.work_dir)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=4)
+    for name, result in results['benchmarks'].items():
+        print(f"{name}: {result['records_per_second']:.0f} records/s"
+              + (f", peak memory {result['peak_memory_bytes']} bytes" if 'peak_memory_bytes' in result else ''))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'Baseline saved to {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            regressions = compare_to_baseline(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f'Regression - {regression}')
+        sys.exit(1 if regressions else 0)
+    else:
+        # a missing baseline must not pass as a run without regressions
+        print(f'No baseline found at {args.baseline}, run with --save-baseline to store one')
+        sys.exit(2)
@@ -1,6 +1,7 @@
+from bisect import bisect_right
 from enum import Enum
 from constants.exceptions import BMIValueError, HealthRiskValueError
-from typing import Type, Union
+from typing import NamedTuple, Optional, Sequence, Type, Union
 
 
 class BMIUnits(Enum):
@@ -21,62 +22,90 @@ class HealthRisk(Enum):
     VERY_HIGH = 5
 
 
-def bmi_level_to_text(units: BMIUnits) -> str:
+# lower bound of every category above the first
+BMI_THRESHOLDS = (18.4, 25.0, 30.0, 35.0, 40.0)
+
+BMI_LEVEL_TEXT = {
+    BMIUnits.UNDERWEIGHT: 'Underweight',
+    BMIUnits.NORMAL_WEIGHT: 'Normal weight',
+    BMIUnits.OVER_WEIGHT: 'Overweight',
+    BMIUnits.MODERATELY_OBESE: 'Moderately obese',
+    BMIUnits.SEVERELY_OBESE: 'Severely obese',
+    BMIUnits.VERY_SEVERELY_OBESE: 'Very severely obese',
+}
+
+HEALTH_RISK_TEXT = {
+    HealthRisk.MALNUTRITION: 'Malnutrition risk',
+    HealthRisk.LOW: 'Low risk',
+    HealthRisk.ENHANCED: 'Enhanced risk',
+    HealthRisk.MEDIUM: 'Medium risk',
+    HealthRisk.HIGH: 'High risk',
+    HealthRisk.VERY_HIGH: 'Very high risk',
+}
 
-    if units == BMIUnits.UNDERWEIGHT:
-        return 'Underweight'
-    elif units == BMIUnits.NORMAL_WEIGHT:
-        return 'Normal weight'
-    elif units == BMIUnits.OVER_WEIGHT:
-        return 'Overweight'
-    elif units == BMIUnits.MODERATELY_OBESE:
-        return 'Moderately obese'
-    elif units == BMIUnits.SEVERELY_OBESE:
-        return 'Severely obese'
-    elif units == BMIUnits.VERY_SEVERELY_OBESE:
-        return 'Very severely obese'
-    else:
+
+def bmi_level_to_text(units: BMIUnits) -> str:
+    try:
+        return BMI_LEVEL_TEXT[units]
+    except (KeyError, TypeError):
         raise BMIValueError('Unknown units: ', units)
 
 
 def health_risk_to_text(units: HealthRisk) -> str:
-
-    if units == HealthRisk.MALNUTRITION:
-        return 'Malnutrition risk'
-    elif units == HealthRisk.LOW:
-        return 'Low risk'
-    elif units == HealthRisk.ENHANCED:
-        return 'Enhanced risk'
-    elif units == HealthRisk.MEDIUM:
-        return 'Medium risk'
-    elif units == HealthRisk.HIGH:
-        return 'High risk'
-    elif units == HealthRisk.VERY_HIGH:
-        return 'Very high risk'
-    else:
+    try:
+        return HEALTH_RISK_TEXT[units]
+    except (KeyError, TypeError):
         raise HealthRiskValueError('Unknown risk: ', units)
 
 
+class Classification(NamedTuple):
+    category: BMIUnits
+    risk: HealthRisk
+    category_text: str
+    risk_text: str
+
+
+class ThresholdClassifier(object):
+    """Classifies a bmi value into its category and health risk with a single bisection of a sorted threshold table.
+
+    thresholds holds the lower bound of every band above the first, categories and risks hold one entry per band.
+    Labels default to the standard texts and every band's result is built once up front."""
+
+    def __init__(self, thresholds: Sequence[float] = BMI_THRESHOLDS, categories: Sequence[BMIUnits] = tuple(BMIUnits),
+                 risks: Sequence[HealthRisk] = tuple(HealthRisk), category_labels: Optional[Sequence[str]] = None,
+                 risk_labels: Optional[Sequence[str]] = None):
+        thresholds = tuple(thresholds)
+        if list(thresholds) != sorted(thresholds):
+            raise ValueError(f'Thresholds must be sorted in ascending order: {thresholds}')
+
+        number_of_bands = len(thresholds) + 1
+        if category_labels is None:
+            category_labels = [bmi_level_to_text(category) for category in categories]
+        if risk_labels is None:
+            risk_labels = [health_risk_to_text(risk) for risk in risks]
+        for name, values in [('categories', categories), ('risks', risks),
+                             ('category_labels', category_labels), ('risk_labels', risk_labels)]:
+            if len(values) != number_of_bands:
+                raise ValueError(f'Expected {number_of_bands} {name} for {len(thresholds)} thresholds, got {len(values)}')
+
+        self.thresholds = thresholds
+        self.bands = tuple(Classification(*band) for band in zip(categories, risks, category_labels, risk_labels))
+
+    def classify(self, bmi_value: float) -> Classification:
+        return self.bands[bisect_right(self.thresholds, bmi_value)]
+
+
+DEFAULT_CLASSIFIER = ThresholdClassifier()
+
+
 def bmi_category_or_risk(bmi_value: float, units: Type[Union[BMIUnits, HealthRisk]]) -> Union[BMIUnits, HealthRisk]:
     """Slightly adjusted ranges in order to avoid having ambiguous in-between category values"""
-
-    if bmi_value < 18.4:
-        return units(0)
-    elif 18.4 <= bmi_value < 25.0:
-        return units(1)
-    elif 25.0 <= bmi_value < 30.0:
-        return units(2)
-    elif 30.0 <= bmi_value < 35.0:
-        return units(3)
-    elif 35.0 <= bmi_value < 40.0:
-        return units(4)
-    elif bmi_value >= 40.0:
-        return units(5)
+    return units(bisect_right(BMI_THRESHOLDS, bmi_value))
 
 
 def bmi_category(bmi_value: float) -> BMIUnits:
-    return bmi_category_or_risk(bmi_value, BMIUnits)
+    return DEFAULT_CLASSIFIER.classify(bmi_value).category
 
 
 def risk_category(bmi_value: float) -> HealthRisk:
-    return bmi_category_or_risk(bmi_value, HealthRisk)
\ No newline at end of file
+    return DEFAULT_CLASSIFIER.classify(bmi_value).risk
@@ -11,4 +11,12 @@ class HealthRiskValueError(ValueError):
     def __init__(self, message, input_risk, *args):
         self.message = message
         self.input_risk = input_risk
-        super(BMIValueError, self).__init__(message, input_risk, *args)
\ No newline at end of file
+        super(HealthRiskValueError, self).__init__(message, input_risk, *args)
+
+
+class SchemeValueError(ValueError):
+    """Raise when an unknown or already registered classification scheme name is encountered"""
+    def __init__(self, message, input_scheme, *args):
+        self.message = message
+        self.input_scheme = input_scheme
+        super(SchemeValueError, self).__init__(message, input_scheme, *args)
@@ -0,0 +1,60 @@
+from constants.bmi_units import BMIUnits, Classification, DEFAULT_CLASSIFIER, HealthRisk, ThresholdClassifier
+from constants.exceptions import SchemeValueError
+from typing import Dict, Iterable, Tuple
+
+WHO_SCHEME = 'who'
+ASIAN_SCHEME = 'asian'
+
+_SCHEMES: Dict[str, ThresholdClassifier] = {}
+
+
+def register_scheme(name: str, classifier: ThresholdClassifier, replace: bool = False) -> None:
+    """Makes a classification scheme available by name, e.g. to DataProcessor.process_data(..., schemes=[name])"""
+    if name in _SCHEMES and not replace:
+        raise SchemeValueError('Scheme already registered: ', name)
+    _SCHEMES[name] = classifier
+
+
+def get_scheme(name: str) -> ThresholdClassifier:
+    try:
+        return _SCHEMES[name]
+    except KeyError:
+        raise SchemeValueError('Unknown scheme: ', name)
+
+
+def scheme_names() -> Tuple[str, ...]:
+    return tuple(_SCHEMES)
+
+
+class SchemeSet(object):
+    """Several named schemes applied together, every bmi value is classified by all of them in one call"""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = tuple(names)
+        self.classifiers = tuple(get_scheme(name) for name in self.names)
+        self._fields = tuple((f'BMICategory_{name}', f'HealthRisk_{name}') for name in self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def classify(self, bmi_value: float) -> Tuple[Classification, ...]:
+        """Returns the classification of every scheme, in the order of names"""
+        return tuple(classifier.classify(bmi_value) for classifier in self.classifiers)
+
+    def add_labels(self, person_data: dict, bmi_value: float) -> None:
+        """Adds BMICategory_<name> and HealthRisk_<name> of every scheme to a record"""
+        for (category_field, risk_field), classifier in zip(self._fields, self.classifiers):
+            classification = classifier.classify(bmi_value)
+            person_data[category_field] = classification.category_text
+            person_data[risk_field] = classification.risk_text
+
+
+register_scheme(WHO_SCHEME, DEFAULT_CLASSIFIER)
+
+# lower cut-off points recommended by the WHO expert consultation for Asian populations
+register_scheme(ASIAN_SCHEME, ThresholdClassifier(
+    thresholds=(18.5, 23.0, 27.5),
+    categories=(BMIUnits.UNDERWEIGHT, BMIUnits.NORMAL_WEIGHT, BMIUnits.OVER_WEIGHT, BMIUnits.MODERATELY_OBESE),
+    risks=(HealthRisk.MALNUTRITION, HealthRisk.LOW, HealthRisk.ENHANCED, HealthRisk.HIGH),
+    category_labels=('Underweight', 'Normal weight', 'Overweight', 'Obese'),
+    risk_labels=('Malnutrition risk', 'Low risk', 'Increased risk', 'High risk')))
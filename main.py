@@ -1,14 +1,64 @@
+import argparse
+import io
 import os
 import json
+import math
 import sys
+from collections import deque
+from itertools import chain, islice
+from multiprocessing import Pool
+from time import perf_counter
 
 from constants.bmi_units import BMIUnits
-from constants.bmi_units import bmi_category, risk_category, bmi_level_to_text, health_risk_to_text
-from typing import Callable
+from constants.bmi_units import bmi_level_to_text, Classification, DEFAULT_CLASSIFIER, ThresholdClassifier
+from constants.schemes import scheme_names, SchemeSet
+from processing.aggregation import Aggregation, GROUP_FIELDS
+from processing.checkpoint import Checkpoint, checkpoint_path, file_fingerprint, is_valid_checkpoint
+from processing.checkpoint import load_checkpoint, save_checkpoint
+from processing.compression import CompressionError, detect_codec, open_text
+from processing.distribution import Distribution
+from processing.json_stream import iter_json_array, JSONArrayError, JSONArrayReader
+from processing.metrics import ProcessingStats, SKIP_ZERO_HEIGHT, STAGE_CLASSIFY, STAGE_COMPUTE, STAGE_PARSE
+from processing.metrics import STAGE_VALIDATE
+from processing.readers import complete_lines_end, detect_format, FORMAT_NDJSON, FORMATS, INPUT_EXTENSIONS
+from processing.readers import iter_line_records, iter_stream_records, LINE_FORMATS, split_lines
+from processing.results import ResultStore
+from processing.scoring_cache import DEFAULT_CACHE_SIZE, ScoringCache
+from processing.sharding import DEFAULT_SHARD_BYTES, iter_input_files, split_json_array, ShardingError
+from processing.validation import describe_rejection, RecordSchema, Validator
+from processing.writers import DEFAULT_MAX_OPEN_FILES, DEFAULT_PARTITION_BUFFER_SIZE, open_writer, PartitionedWriter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# (path, format, start, end, timed, scheme_set) of a file or a part of it processed by a worker
+ShardTask = Tuple[str, str, Optional[int], Optional[int], bool, Optional[SchemeSet]]
+
+# shards submitted to the pool ahead of the one being consumed, per worker
+MAX_IN_FLIGHT_PER_WORKER = 2
+
+# category/risk code given to batch rows whose bmi could not be calculated (zero height)
+INVALID_CODE = -1
+
+
+class BMIBatch(NamedTuple):
+    bmi: Any
+    category: Any
+    risk: Any
 
 
 class BMICalculator(object):
-    def __init__(self):
+    def __init__(self, classifier: ThresholdClassifier = DEFAULT_CLASSIFIER, schema: Optional[RecordSchema] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.classifier = classifier
+        self.schema = schema
+        self._validator: Optional[Validator] = None
+        # a cache_size of 0 scores every record from scratch
+        self.scoring_cache = ScoringCache(self, cache_size) if cache_size else None
+
         self.min_height_m = 0
         self.min_weight_kg = 0
 
@@ -20,96 +70,605 @@ class BMICalculator(object):
         fn = lambda mass_kg, height_m: mass_kg/height_m**2
         return fn
 
+    @property
+    def validator(self) -> Validator:
+        """Input records are checked with the given schema, or one built from the min/max bounds on first use"""
+        if self._validator is None:
+            self._validator = (self.schema or RecordSchema.from_calculator(self)).compile()
+        return self._validator
+
+    def in_bounds(self, mass_kg: float, height: float) -> bool:
+        return (self.min_height_m <= height <= self.max_height_m and
+                self.min_weight_kg <= mass_kg <= self.max_weight_kg)
+
     def calculate(self, mass_kg: float, height: float, in_cm=True, decimal_places=2) -> float:
         if in_cm:
             height_m = height / 100
         else:
             height_m = height
 
-        if height < self.min_height_m:
-            return 0
-        if mass_kg < self.min_weight_kg:
-            return 0
-
-        if height > self.max_height_m:
-            return 0
-        if mass_kg > self.max_weight_kg:
+        if not self.in_bounds(mass_kg, height):
             return 0
 
         bmi_index = self._bmi_formula()(mass_kg, height_m)
         bmi_index_rounded = round(bmi_index, decimal_places)
         return bmi_index_rounded
 
+    def calculate_batch(self, mass_kg, height, in_cm=True, decimal_places=2) -> BMIBatch:
+        """Vectorised equivalent of calculate, category and health_risk for array-like columns of weights and heights.
+
+        Returns numpy arrays of bmi values together with BMIUnits and HealthRisk codes. Values are identical to the
+        scalar path, rows without a finite bmi (a zero height, a height so small its square underflows to zero, or a
+        non finite input) have a nan bmi and INVALID_CODE as category and risk instead of raising ZeroDivisionError."""
+        if np is None:
+            raise ImportError('numpy is required for batch calculations')
+
+        mass_kg = np.asarray(mass_kg, dtype=np.float64)
+        height = np.asarray(height, dtype=np.float64)
+        mass_kg, height = np.broadcast_arrays(np.atleast_1d(mass_kg), np.atleast_1d(height))
+        height_m = height / 100 if in_cm else height
+
+        out_of_bounds = ((height < self.min_height_m) | (mass_kg < self.min_weight_kg) |
+                         (height > self.max_height_m) | (mass_kg > self.max_weight_kg))
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore', under='ignore'):
+            bmi_index = mass_kg / height_m**2
+            not_finite = ~np.isfinite(bmi_index) & ~out_of_bounds
+            bmi_index_rounded = np.round(bmi_index, decimal_places)
+
+            # np.round scales before rounding which may disagree with round() on values close to a tie
+            scaled = bmi_index * 10.0**decimal_places
+            near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        for i in np.flatnonzero(near_tie & ~out_of_bounds & ~not_finite):
+            bmi_index_rounded.flat[i] = round(float(bmi_index.flat[i]), decimal_places)
+
+        bmi_index_rounded[out_of_bounds] = 0
+        bmi_index_rounded[not_finite] = np.nan
+
+        bands = np.searchsorted(np.asarray(self.classifier.thresholds), bmi_index_rounded, side='right')
+        category_codes = np.array([band.category.value for band in self.classifier.bands], dtype=np.int8)[bands]
+        risk_codes = np.array([band.risk.value for band in self.classifier.bands], dtype=np.int8)[bands]
+        category_codes[not_finite] = INVALID_CODE
+        risk_codes[not_finite] = INVALID_CODE
+        return BMIBatch(bmi_index_rounded, category_codes, risk_codes)
+
     @staticmethod
     def category(bmi: float) -> str:
-        estimated_bmi_category = bmi_category(bmi)
-        friendly_bmi_category = bmi_level_to_text(estimated_bmi_category)
-        return friendly_bmi_category
+        return DEFAULT_CLASSIFIER.classify(bmi).category_text
 
     @staticmethod
     def health_risk(bmi: float) -> str:
-        estimated_risk_category = risk_category(bmi)
-        friendly_risk_category = health_risk_to_text(estimated_risk_category)
-        return friendly_risk_category
+        return DEFAULT_CLASSIFIER.classify(bmi).risk_text
+
+    def classify(self, bmi: float) -> Classification:
+        """Returns category, risk and both of their texts with a single lookup"""
+        return self.classifier.classify(bmi)
+
+    def score(self, mass_kg: float, height: float, in_cm=True, decimal_places=2,
+              stage_seconds: Optional[Dict[str, float]] = None) -> Tuple[float, Classification]:
+        """Returns the bmi and its classification, from the scoring cache when one is configured. The time spent
+        computing and classifying is added to stage_seconds when given, a cache hit counts as compute."""
+        if self.scoring_cache is not None:
+            return self.scoring_cache.score(mass_kg, height, in_cm, decimal_places, stage_seconds)
+        return self.calculate_and_classify(mass_kg, height, in_cm, decimal_places, stage_seconds)
+
+    def calculate_and_classify(self, mass_kg: float, height: float, in_cm=True, decimal_places=2,
+                               stage_seconds: Optional[Dict[str, float]] = None) -> Tuple[float, Classification]:
+        """Same as score without the cache"""
+        if stage_seconds is None:
+            bmi_value = self.calculate(mass_kg, height, in_cm, decimal_places)
+            return bmi_value, self.classify(bmi_value)
+
+        start = perf_counter()
+        bmi_value = self.calculate(mass_kg, height, in_cm, decimal_places)
+        computed = perf_counter()
+        classification = self.classify(bmi_value)
+        stage_seconds[STAGE_COMPUTE] += computed - start
+        stage_seconds[STAGE_CLASSIFY] += perf_counter() - computed
+        return bmi_value, classification
 
 
 class DataProcessor(object):
 
     @staticmethod
-    def process_data(data_file_src) -> list:
-        """Accepts the path to a json file as input and return an updated list with added bmi, category and risk"""
-        updated_json_file_data = []
-        bmi_calculator = BMICalculator()
+    def _score_record(person_data: dict, bmi_calculator: BMICalculator,
+                      stats: ProcessingStats) -> Optional[Tuple[float, Classification]]:
+        """Validates a single record and returns its bmi and classification, returns None if the record is skipped"""
+        stats.records_read += 1
+        timed = stats.timed
+        if timed:
+            start = perf_counter()
+
+        reason = bmi_calculator.validator(person_data)
+        if reason is not None:
+            stats.skip(reason, person_data, describe_rejection(reason, person_data))
+            return None
+        height = person_data['HeightCm']
+        weight = person_data['WeightKg']
+        if timed:
+            validated = perf_counter()
+            stats.stage_seconds[STAGE_VALIDATE] += validated - start
 
+        try:
+            bmi_value, classification = bmi_calculator.score(weight, height,
+                                                             stage_seconds=stats.stage_seconds if timed else None)
+        except ZeroDivisionError:
+            # a non zero height whose square underflows to 0
+            bmi_value = math.inf
+        if not math.isfinite(bmi_value):
+            stats.skip(SKIP_ZERO_HEIGHT, person_data, describe_rejection(SKIP_ZERO_HEIGHT, person_data))
+            return None
+        if bmi_value == 0 and not bmi_calculator.in_bounds(weight, height):
+            stats.out_of_bounds += 1
+        stats.accepted += 1
+        return bmi_value, classification
+
+    @staticmethod
+    def _enrich_record(person_data: dict, bmi_calculator: BMICalculator, stats: ProcessingStats,
+                       scheme_set: Optional[SchemeSet] = None) -> Optional[dict]:
+        """Adds bmi, category and risk to a single record, returns None if the record is skipped"""
+        score = DataProcessor._score_record(person_data, bmi_calculator, stats)
+        if score is None:
+            return None
+
+        bmi_value, classification = score
+        person_data['BMI'] = bmi_value
+        person_data['BMICategory'] = classification.category_text
+        person_data['HealthRisk'] = classification.risk_text
+        if scheme_set:
+            scheme_set.add_labels(person_data, bmi_value)
+        return person_data
+
+    @staticmethod
+    def _iter_raw_records(data_file_src, data_format: Optional[str] = None,
+                          stats: Optional[ProcessingStats] = None) -> Iterator[dict]:
+        """Lazily yields the unprocessed records of a json, ndjson or csv file, reporting missing and malformed files.
+        Compressed files are decompressed in a background thread while their records are parsed."""
+        data_format = detect_format(data_file_src, data_format)
         if os.path.exists(data_file_src):
+            codec = detect_codec(data_file_src)
             try:
-                with open(data_file_src, 'r') as file:
-                    raw_file_data = file.read()
+                if data_format in LINE_FORMATS and codec is None:
+                    yield from iter_line_records(data_file_src, data_format, stats=stats)
+                elif data_format in LINE_FORMATS:
+                    with open_text(data_file_src, codec) as file:
+                        yield from iter_stream_records(file, data_format, data_file_src, stats)
+                else:
+                    with open_text(data_file_src, codec) as file:
+                        reader = JSONArrayReader(file)
+                        try:
+                            yield from reader
+                        finally:
+                            if stats is not None and stats.timed:
+                                stats.add_read_time(reader.read_seconds)
             except FileNotFoundError:
                 print(f'Failed to find test data at {data_file_src}')
-            else:
+            except json.JSONDecodeError as e:
+                print(f'Failed to decode JSON data in {data_file_src} - {e}')
+            except JSONArrayError:
+                print(f'Incorrect JSON file data found in {data_file_src}')
+            except UnicodeDecodeError as e:
+                print(f'Failed to decode data in {data_file_src} - {e}')
+            except CompressionError as e:
+                print(e)
+
+    @staticmethod
+    def _iter_parsed_records(data_file_src, data_format: Optional[str], stats: ProcessingStats) -> Iterator[dict]:
+        """Same as _iter_raw_records, adding the time spent parsing to the stats when they are timed"""
+        raw_records = DataProcessor._iter_raw_records(data_file_src, data_format, stats)
+        if stats.timed:
+            raw_records = stats.timed_iter(raw_records, STAGE_PARSE)
+        return raw_records
+
+    @staticmethod
+    def _iter_scored_records(data_file_src, bmi_calculator: BMICalculator, data_format: Optional[str] = None,
+                             stats: Optional[ProcessingStats] = None) -> Iterator[Tuple[dict, float, Classification]]:
+        """Lazily yields every accepted record of a file together with its bmi and classification"""
+        stats = stats if stats is not None else ProcessingStats()
+        for person_data in DataProcessor._iter_parsed_records(data_file_src, data_format, stats):
+            score = DataProcessor._score_record(person_data, bmi_calculator, stats)
+            if score is not None:
+                yield (person_data, *score)
+
+    @staticmethod
+    def _iter_enriched_records(data_file_src, data_format: Optional[str] = None,
+                               stats: Optional[ProcessingStats] = None,
+                               scheme_set: Optional[SchemeSet] = None) -> Iterator[dict]:
+        bmi_calculator = BMICalculator()
+        stats = stats if stats is not None else ProcessingStats()
+
+        for person_data in DataProcessor._iter_parsed_records(data_file_src, data_format, stats):
+            person_data = DataProcessor._enrich_record(person_data, bmi_calculator, stats, scheme_set)
+            if person_data is not None:
+                yield person_data
+
+    @staticmethod
+    def iter_records(data_file_src, data_format: Optional[str] = None, stats: Optional[ProcessingStats] = None,
+                     schemes: Iterable[str] = ()) -> Iterator[dict]:
+        """Accepts the path to a json file as input and lazily yields each record with added bmi, category and risk.
+
+        The top level json array is parsed incrementally so memory use does not grow with the size of the file.
+        Records preceding a decoding error have already been yielded by the time the error is reported.
+        Newline delimited json and csv files are read instead when data_format or the file extension says so.
+        Pass a ProcessingStats to collect counters and stage timings. Every registered scheme named in schemes adds
+        its own BMICategory_<name> and HealthRisk_<name> from the same bmi value."""
+        return DataProcessor._iter_enriched_records(data_file_src, data_format, stats, SchemeSet(schemes))
+
+    @staticmethod
+    def process_columnar(data_file_src, bmi_calculator: Optional[BMICalculator] = None,
+                         data_format: Optional[str] = None, stats: Optional[ProcessingStats] = None) -> ResultStore:
+        """Accepts the path to a json file as input and return a ResultStore with the bmi, category and risk of
+        every accepted record, without keeping the records themselves"""
+        bmi_calculator = bmi_calculator or BMICalculator()
+        result_store = ResultStore(bmi_calculator.classifier)
+
+        for person_data, bmi_value, classification in \
+                DataProcessor._iter_scored_records(data_file_src, bmi_calculator, data_format, stats):
+            result_store.append(person_data['Gender'], person_data['HeightCm'], person_data['WeightKg'],
+                                bmi_value, classification)
+        return result_store
+
+    @staticmethod
+    def aggregate(data_file_src, group_by: Iterable[str] = ('BMICategory',),
+                  bmi_calculator: Optional[BMICalculator] = None, data_format: Optional[str] = None,
+                  stats: Optional[ProcessingStats] = None) -> Aggregation:
+        """Accepts the path to a json file as input and return the counts and sums of accepted records per group,
+        computed in a single streaming pass without building any output records"""
+        bmi_calculator = bmi_calculator or BMICalculator()
+        aggregation = Aggregation(group_by)
+
+        for person_data, bmi_value, classification in \
+                DataProcessor._iter_scored_records(data_file_src, bmi_calculator, data_format, stats):
+            aggregation.add(person_data['Gender'], person_data['HeightCm'], person_data['WeightKg'],
+                            bmi_value, classification)
+        return aggregation
+
+    @staticmethod
+    def aggregate_schemes(data_file_src, schemes: Iterable[str], group_by: Iterable[str] = ('BMICategory',),
+                          bmi_calculator: Optional[BMICalculator] = None, data_format: Optional[str] = None,
+                          stats: Optional[ProcessingStats] = None) -> Dict[str, Aggregation]:
+        """Same as aggregate for every registered scheme named in schemes, in a single pass that computes the bmi of
+        every record once. Returns the aggregation of each scheme by name."""
+        bmi_calculator = bmi_calculator or BMICalculator()
+        scheme_set = SchemeSet(schemes)
+        aggregations = [Aggregation(group_by) for _ in scheme_set.names]
+
+        for person_data, bmi_value, _ in \
+                DataProcessor._iter_scored_records(data_file_src, bmi_calculator, data_format, stats):
+            gender, height, weight = person_data['Gender'], person_data['HeightCm'], person_data['WeightKg']
+            for aggregation, classification in zip(aggregations, scheme_set.classify(bmi_value)):
+                aggregation.add(gender, height, weight, bmi_value, classification)
+        return dict(zip(scheme_set.names, aggregations))
+
+    @staticmethod
+    def describe(data_file_src, group_by: Iterable[str] = ('Gender', 'BMICategory'),
+                 bmi_calculator: Optional[BMICalculator] = None, data_format: Optional[str] = None,
+                 stats: Optional[ProcessingStats] = None, **distribution_options) -> Distribution:
+        """Accepts the path to a json file as input and return the bmi percentiles, histogram and most extreme records
+        per group, computed in a single streaming pass. distribution_options are passed on to Distribution, the
+        distributions of several files or shards can be combined with Distribution.merge"""
+        bmi_calculator = bmi_calculator or BMICalculator()
+        distribution = Distribution(group_by, **distribution_options)
+
+        for person_data, bmi_value, classification in \
+                DataProcessor._iter_scored_records(data_file_src, bmi_calculator, data_format, stats):
+            distribution.add(person_data, bmi_value, classification)
+        return distribution
+
+    @staticmethod
+    def _aggregate_record(person_data: dict, aggregation: Aggregation, bmi_calculator: BMICalculator,
+                          stats: ProcessingStats) -> None:
+        """Scores a single record and adds it to the aggregation unless it is skipped"""
+        score = DataProcessor._score_record(person_data, bmi_calculator, stats)
+        if score is not None:
+            bmi_value, classification = score
+            aggregation.add(person_data['Gender'], person_data['HeightCm'], person_data['WeightKg'],
+                            bmi_value, classification)
+
+    @staticmethod
+    def aggregate_incremental(data_file_src, group_by: Iterable[str] = ('BMICategory',),
+                              checkpoint_src: Optional[str] = None,
+                              bmi_calculator: Optional[BMICalculator] = None,
+                              stats: Optional[ProcessingStats] = None,
+                              data_format: Optional[str] = None) -> Aggregation:
+        """Same as aggregate but resumes from the checkpoint stored next to the file, only records appended since the
+        previous run are processed. The whole file is processed again if it changed in any other way. Json arrays,
+        ndjson and csv files are resumed, lines only once they end with a newline. Compressed files are always
+        aggregated in full."""
+        bmi_calculator = bmi_calculator or BMICalculator()
+        stats = stats if stats is not None else ProcessingStats()
+        checkpoint_src = checkpoint_src or checkpoint_path(data_file_src)
+        data_format = detect_format(data_file_src, data_format)
+
+        if detect_codec(data_file_src) is not None:
+            print(f'Compressed files can not be resumed, aggregating all of {data_file_src}')
+            return DataProcessor.aggregate(data_file_src, group_by, bmi_calculator, data_format, stats)
+
+        checkpoint = load_checkpoint(checkpoint_src)
+        if checkpoint is not None and checkpoint.aggregation.group_by == tuple(group_by) and \
+                is_valid_checkpoint(checkpoint, data_file_src):
+            offset, record_index, aggregation = checkpoint.offset, checkpoint.record_index, checkpoint.aggregation
+        else:
+            offset, record_index, aggregation = 0, 0, Aggregation(group_by)
+
+        if not os.path.exists(data_file_src):
+            return aggregation
+
+        if data_format in LINE_FORMATS:
+            # a line still being written is left for the next run
+            end = complete_lines_end(data_file_src)
+            try:
+                for person_data in iter_line_records(data_file_src, data_format, offset, end, stats):
+                    record_index += 1
+                    DataProcessor._aggregate_record(person_data, aggregation, bmi_calculator, stats)
+            except UnicodeDecodeError as e:
+                # records of the failed run are not checkpointed as the offset of the error is unknown
+                print(f'Failed to decode data in {data_file_src} - {e}')
+                return aggregation
+            offset = end
+        else:
+            with open(data_file_src, 'rb') as binary_file:
+                binary_file.seek(offset)
+                # newline='' keeps \r\n line endings so the reader counts the bytes actually in the file
+                file = io.TextIOWrapper(binary_file, encoding='utf-8', newline='')
+                reader = JSONArrayReader(file, resume=offset > 0)
                 try:
-                    json_file_data = json.loads(raw_file_data)
+                    for person_data in reader:
+                        record_index += 1
+                        DataProcessor._aggregate_record(person_data, aggregation, bmi_calculator, stats)
                 except json.JSONDecodeError as e:
                     print(f'Failed to decode JSON data in {data_file_src} - {e}')
-                except TypeError:
+                except JSONArrayError:
                     print(f'Incorrect JSON file data found in {data_file_src}')
+                except UnicodeDecodeError as e:
+                    print(f'Failed to decode data in {data_file_src} - {e}')
+            offset += reader.offset
+
+        if offset > 0:
+            save_checkpoint(checkpoint_src, Checkpoint(offset, record_index, file_fingerprint(data_file_src, offset),
+                                                       aggregation))
+        return aggregation
+
+    @staticmethod
+    def process_data(data_file_src, data_format: Optional[str] = None, stats: Optional[ProcessingStats] = None,
+                     schemes: Iterable[str] = ()) -> list:
+        """Accepts the path to a json file as input and return an updated list with added bmi, category and risk.
+        The file is parsed incrementally, so a decoding error is printed and the records preceding it are still
+        returned rather than an empty list."""
+        return list(DataProcessor.iter_records(data_file_src, data_format, stats, schemes))
+
+    @staticmethod
+    def _shard_tasks(data_file_src: str, shard_bytes: int, data_format: Optional[str] = None, timed: bool = False,
+                     scheme_set: Optional[SchemeSet] = None) -> Iterator[ShardTask]:
+        """Yields (path, format, start, end, timed, scheme_set) tasks for a file, start and end are None when it is
+        processed whole. The scheme set is passed as is so schemes registered after the workers started still
+        apply."""
+        data_format = detect_format(data_file_src, data_format)
+        try:
+            # compressed files can not be split at byte offsets and are processed whole
+            if os.path.getsize(data_file_src) > shard_bytes and detect_codec(data_file_src) is None:
+                if data_format in LINE_FORMATS:
+                    shards = split_lines(data_file_src, shard_bytes)
                 else:
-                    for person_data in json_file_data:
-                        if all([key in person_data for key in ['Gender', 'HeightCm', 'WeightKg']]):
-                            gender = person_data['Gender']
-                            height = person_data['HeightCm']
-                            if not type(height) == int:
-                                print(f'Warning - unexpected type {type(height)} found for height, should be int')
-                                continue
-                            weight = person_data['WeightKg']
-                            if not type(weight) == int:
-                                print(f'Warning - unexpected type {type(height)} found for weight, should be int')
-                                continue
-
-                            try:
-                                bmi_value = bmi_calculator.calculate(weight, height)
-                            except ZeroDivisionError:
-                                print(f'Incomplete data found for weight or height.. skipping - {weight} {height}')
-                            else:
-                                bmi_category = bmi_calculator.category(bmi_value)
-                                health_risk = bmi_calculator.health_risk(bmi_value)
-
-                                person_data['BMI'] = bmi_value
-                                person_data['BMICategory'] = bmi_category
-                                person_data['HealthRisk'] = health_risk
-                                updated_json_file_data.append(person_data)
-                        else:
-                            print(f'Incomplete data found for current record.. skipping - {person_data}')
-                            continue
-
-        return updated_json_file_data
+                    shards = split_json_array(data_file_src, shard_bytes)
+                for start, end in shards:
+                    yield data_file_src, data_format, start, end, timed, scheme_set
+                return
+        except (OSError, ShardingError):
+            # leave reporting the problem to the sequential path
+            pass
+        yield data_file_src, data_format, None, None, timed, scheme_set
 
+    @staticmethod
+    def _process_shard(task: ShardTask) -> Tuple[str, Optional[List[dict]], Optional[str], ProcessingStats,
+                                                 List[Tuple[str, int, object]]]:
+        """Processes a single task from _shard_tasks, returns the path, its records, a decoding error if any, the
+        stats of the shard and the (reason, index, record) of every skipped record, indexed within the shard.
+        The records are None for a compressed file, its size is not bounded by shard_bytes so the caller streams it
+        rather than have every record held in memory and pickled at once."""
+        data_file_src, data_format, start, end, timed, scheme_set = task
+        # hooks can not be sent to a worker, skipped records are handed back to be replayed by the caller
+        skipped_records = []
+        stats = ProcessingStats(timed, on_skip=lambda reason, index, person_data:
+                                skipped_records.append((reason, index, person_data)))
+        if start is None:
+            if detect_codec(data_file_src) is not None:
+                return data_file_src, None, None, stats, skipped_records
+            updated_json_file_data = list(
+                DataProcessor._iter_enriched_records(data_file_src, data_format, stats, scheme_set))
+            return data_file_src, updated_json_file_data, None, stats, skipped_records
 
-if __name__ == '__main__':
-    data_file_src = 'data/data.json'
-    target_group = BMIUnits.OVER_WEIGHT
+        bmi_calculator = BMICalculator()
+        updated_json_file_data = []
+        if data_format in LINE_FORMATS:
+            for person_data in iter_line_records(data_file_src, data_format, start, end, stats):
+                updated_person_data = DataProcessor._enrich_record(person_data, bmi_calculator, stats, scheme_set)
+                if updated_person_data is not None:
+                    updated_json_file_data.append(updated_person_data)
+            return data_file_src, updated_json_file_data, None, stats, skipped_records
+
+        with open(data_file_src, 'rb') as file:
+            file.seek(start)
+            raw_shard_data = file.read(end - start).decode('utf-8')
+        try:
+            for person_data in iter_json_array(io.StringIO('[' + raw_shard_data + ']')):
+                updated_person_data = DataProcessor._enrich_record(person_data, bmi_calculator, stats, scheme_set)
+                if updated_person_data is not None:
+                    updated_json_file_data.append(updated_person_data)
+        except json.JSONDecodeError as e:
+            error = f'Failed to decode JSON data in {data_file_src} - {e}'
+            return data_file_src, updated_json_file_data, error, stats, skipped_records
+        return data_file_src, updated_json_file_data, None, stats, skipped_records
+
+    @staticmethod
+    def _iter_bounded(pool: Pool, tasks: Iterable[ShardTask], max_in_flight: int) -> Iterator:
+        """Same as pool.imap(_process_shard, tasks) but no more than max_in_flight tasks are submitted ahead of the
+        result being consumed, so a slow consumer does not let finished shards pile up in memory"""
+        in_flight = deque()
+        for task in tasks:
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().get()
+            in_flight.append(pool.apply_async(DataProcessor._process_shard, (task,)))
+        while in_flight:
+            yield in_flight.popleft().get()
+
+    @staticmethod
+    def iter_many(paths_or_dir: Union[str, Iterable[str]], workers: Optional[int] = None,
+                  shard_bytes: int = DEFAULT_SHARD_BYTES, data_format: Optional[str] = None,
+                  stats: Optional[ProcessingStats] = None, schemes: Iterable[str] = ()) -> Iterator[dict]:
+        """Yields the records of files or directories of them as iter_records would, using a pool of workers"""
+        timed = stats is not None and stats.timed
+        scheme_set = SchemeSet(schemes)
+        tasks = (task for data_file_src in iter_input_files(paths_or_dir, INPUT_EXTENSIONS)
+                 for task in DataProcessor._shard_tasks(data_file_src, shard_bytes, data_format, timed, scheme_set))
+
+        first_tasks = list(islice(tasks, 2))
+        pool = None
+        if len(first_tasks) < 2:
+            # a single shard is read here as a whole, starting workers would cost more than they save
+            results = ((task[0], None, None, ProcessingStats(timed), []) for task in first_tasks)
+        elif workers == 1:
+            results = map(DataProcessor._process_shard, chain(first_tasks, tasks))
+        else:
+            workers = workers or os.cpu_count() or 1
+            pool = Pool(workers)
+            # bounds the shards processed ahead of the records being consumed
+            results = DataProcessor._iter_bounded(pool, chain(first_tasks, tasks), MAX_IN_FLIGHT_PER_WORKER * workers)
+
+        try:
+            failed_file_src = None
+            current_file_src, file_records_read = None, 0
+            for data_file_src, updated_json_file_data, error, shard_stats, skipped_records in results:
+                if data_file_src == failed_file_src:
+                    # a decoding error stops the rest of its file, as it does in iter_records
+                    continue
+                if data_file_src != current_file_src:
+                    current_file_src, file_records_read = data_file_src, 0
+                if stats is not None and stats.on_skip is not None:
+                    # shards index their records from 0, shift them by the records read in the earlier shards
+                    for reason, index, person_data in skipped_records:
+                        stats.on_skip(reason, file_records_read + index, person_data)
+                file_records_read += shard_stats.records_read
+                if updated_json_file_data is None:
+                    # compressed files can not be split and are streamed here while the workers carry on with the
+                    # following shards, the stats of the file are complete once its last record is yielded
+                    if stats is not None:
+                        shard_stats.on_skip = stats.on_skip
+                    updated_json_file_data = DataProcessor._iter_enriched_records(data_file_src, data_format,
+                                                                                  shard_stats, scheme_set)
+                yield from updated_json_file_data
+                if stats is not None:
+                    stats.merge(shard_stats)
+                if error is not None:
+                    print(error)
+                    failed_file_src = data_file_src
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    @staticmethod
+    def process_many(paths_or_dir: Union[str, Iterable[str]], workers: Optional[int] = None,
+                     shard_bytes: int = DEFAULT_SHARD_BYTES, data_format: Optional[str] = None,
+                     stats: Optional[ProcessingStats] = None, schemes: Iterable[str] = ()) -> list:
+        """Accepts json files or directories and return an updated list with added bmi, category and risk"""
+        return list(DataProcessor.iter_many(paths_or_dir, workers, shard_bytes, data_format, stats, schemes))
+
+    @staticmethod
+    def write_many(paths_or_dir: Union[str, Iterable[str]], output_file_src: str, output_format: Optional[str] = None,
+                   workers: Optional[int] = None, shard_bytes: int = DEFAULT_SHARD_BYTES,
+                   data_format: Optional[str] = None, stats: Optional[ProcessingStats] = None,
+                   on_records: Optional[Callable[[Iterable[dict]], Iterable[dict]]] = None,
+                   schemes: Iterable[str] = ()) -> int:
+        """Streams the records of iter_many to a json, ndjson or csv file as they are produced, the output format
+        defaults to the one matching the file extension. on_records may wrap the record stream, e.g. to count
+        records on the way out. Returns the number of records written."""
+        records = DataProcessor.iter_many(paths_or_dir, workers, shard_bytes, data_format, stats, schemes)
+        if on_records is not None:
+            records = on_records(records)
+        with open_writer(output_file_src, output_format) as writer:
+            return writer.write_all(records)
 
-    processed_data = DataProcessor.process_data(data_file_src)
-    overweight_data = [data for data in processed_data if data['BMICategory'] == bmi_level_to_text(target_group)]
-    print(f'{len(overweight_data)} person(s) are classified as being {bmi_level_to_text(target_group)}')
\ No newline at end of file
+    @staticmethod
+    def write_partitioned(paths_or_dir: Union[str, Iterable[str]], output_dir: str,
+                          partition_by: Sequence[str] = ('BMICategory', 'Gender'),
+                          output_format: str = FORMAT_NDJSON, workers: Optional[int] = None,
+                          shard_bytes: int = DEFAULT_SHARD_BYTES, data_format: Optional[str] = None,
+                          stats: Optional[ProcessingStats] = None, schemes: Iterable[str] = (),
+                          max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+                          buffer_size: int = DEFAULT_PARTITION_BUFFER_SIZE,
+                          on_records: Optional[Callable[[Iterable[dict]], Iterable[dict]]] = None) -> Dict[str, int]:
+        """Streams the records of iter_many into one file per combination of the partition_by fields within
+        output_dir, reading the input once. Categories and risks are named by their code, e.g.
+        BMICategory-3_Gender-Female.ndjson. on_records may wrap the record stream as in write_many.
+        Returns the number of records written to every file."""
+        classifier = BMICalculator().classifier
+        value_names = {'BMICategory': {band.category_text: str(band.category.value) for band in classifier.bands},
+                       'HealthRisk': {band.risk_text: str(band.risk.value) for band in classifier.bands}}
+
+        records = DataProcessor.iter_many(paths_or_dir, workers, shard_bytes, data_format, stats, schemes)
+        if on_records is not None:
+            records = on_records(records)
+        with PartitionedWriter(output_dir, partition_by, output_format, buffer_size, max_open_files,
+                               value_names) as writer:
+            writer.write_all(records)
+        return writer.counts()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Adds bmi, category and risk to json, ndjson or csv records and '
+                                                 'counts the people in the target groups')
+    parser.add_argument('inputs', nargs='*', default=['data/data.json'], help='input files or directories of them')
+    parser.add_argument('--target', action='append', choices=[units.name for units in BMIUnits],
+                        help='category to count, may be given more than once, defaults to OVER_WEIGHT')
+    parser.add_argument('--output', help='path the enriched records are streamed to, nothing is written without it')
+    parser.add_argument('--partition-by', action='append', choices=GROUP_FIELDS,
+                        help='writes one file per value of the field into the --output directory, may be given more '
+                             'than once')
+    parser.add_argument('--output-format', choices=FORMATS, help='defaults to the output file extension')
+    parser.add_argument('--input-format', choices=FORMATS, help='defaults to the extension of every input file')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of cpus')
+    parser.add_argument('--scheme', action='append', default=[], choices=scheme_names(),
+                        help='additional classification scheme added to every written record, may be given more than '
+                             'once')
+    args = parser.parse_args(argv)
+    if args.output is None:
+        for option, value in [('--partition-by', args.partition_by), ('--scheme', args.scheme),
+                              ('--output-format', args.output_format)]:
+            if value:
+                parser.error(f'{option} requires --output')
+
+    target_groups = [BMIUnits[name] for name in args.target or [BMIUnits.OVER_WEIGHT.name]]
+    if args.output is None:
+        aggregation = Aggregation(('BMICategory',))
+        for data_file_src in iter_input_files(args.inputs, INPUT_EXTENSIONS):
+            aggregation.merge(DataProcessor.aggregate(data_file_src, data_format=args.input_format))
+        counts = {target_group: aggregation.count(BMICategory=target_group) for target_group in target_groups}
+    else:
+        target_texts = {bmi_level_to_text(target_group): target_group for target_group in target_groups}
+        counts = dict.fromkeys(target_groups, 0)
+
+        def count_targets(records: Iterable[dict]) -> Iterator[dict]:
+            for record in records:
+                target_group = target_texts.get(record['BMICategory'])
+                if target_group is not None:
+                    counts[target_group] += 1
+                yield record
+
+        if args.partition_by:
+            counts_per_file = DataProcessor.write_partitioned(
+                args.inputs, args.output, args.partition_by, args.output_format or FORMAT_NDJSON, args.workers,
+                data_format=args.input_format, schemes=args.scheme, on_records=count_targets)
+            print(f'{sum(counts_per_file.values())} record(s) written to {len(counts_per_file)} file(s) '
+                  f'in {args.output}')
+        else:
+            written = DataProcessor.write_many(args.inputs, args.output, args.output_format, args.workers,
+                                               data_format=args.input_format, on_records=count_targets,
+                                               schemes=args.scheme)
+            print(f'{written} record(s) written to {args.output}')
+
+    for target_group, count in counts.items():
+        print(f'{count} person(s) are classified as being {bmi_level_to_text(target_group)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+from constants.bmi_units import BMIUnits, Classification, HealthRisk
+from typing import Dict, Iterable, Tuple
+
+GROUP_FIELDS = ('Gender', 'BMICategory', 'HealthRisk')
+
+# turns the plain values of a serialised group key back into its members
+_GROUP_FIELD_TYPES = {'Gender': str, 'BMICategory': BMIUnits, 'HealthRisk': HealthRisk}
+
+
+class GroupTotals(object):
+    __slots__ = ('count', 'bmi_sum', 'height_sum', 'weight_sum')
+
+    def __init__(self, count: int = 0, bmi_sum: float = 0, height_sum: float = 0, weight_sum: float = 0):
+        self.count = count
+        self.bmi_sum = bmi_sum
+        self.height_sum = height_sum
+        self.weight_sum = weight_sum
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GroupTotals) and self.as_tuple() == other.as_tuple()
+
+    def __repr__(self) -> str:
+        return (f'GroupTotals(count={self.count}, bmi_sum={self.bmi_sum}, height_sum={self.height_sum}, '
+                f'weight_sum={self.weight_sum})')
+
+    def as_tuple(self) -> tuple:
+        return self.count, self.bmi_sum, self.height_sum, self.weight_sum
+
+    @property
+    def bmi_mean(self) -> float:
+        return self.bmi_sum / self.count if self.count else 0
+
+    def add(self, height: float, weight: float, bmi: float) -> None:
+        self.count += 1
+        self.bmi_sum += bmi
+        self.height_sum += height
+        self.weight_sum += weight
+
+    def merge(self, other: 'GroupTotals') -> None:
+        self.count += other.count
+        self.bmi_sum += other.bmi_sum
+        self.height_sum += other.height_sum
+        self.weight_sum += other.weight_sum
+
+
+class Aggregation(object):
+    """Running counts and sums of processed records per group.
+
+    Groups are keyed on a tuple holding, in group_by order, the gender string and the BMIUnits/HealthRisk members of
+    the record, so no labels are compared and no record has to be kept."""
+
+    def __init__(self, group_by: Iterable[str] = ('BMICategory',)):
+        self.group_by = tuple(group_by)
+        for field in self.group_by:
+            if field not in GROUP_FIELDS:
+                raise ValueError(f'Unknown group field {field}, expected one of {GROUP_FIELDS}')
+        self._key_indexes = tuple(GROUP_FIELDS.index(field) for field in self.group_by)
+        self.groups: Dict[Tuple, GroupTotals] = {}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Aggregation) and (self.group_by, self.groups) == (other.group_by, other.groups)
+
+    def add(self, gender: str, height: float, weight: float, bmi: float, classification: Classification) -> None:
+        values = (gender, classification.category, classification.risk)
+        key = tuple([values[index] for index in self._key_indexes])
+        group_totals = self.groups.get(key)
+        if group_totals is None:
+            group_totals = self.groups[key] = GroupTotals()
+        group_totals.add(height, weight, bmi)
+
+    def merge(self, other: 'Aggregation') -> None:
+        """Adds the totals of another aggregation with the same grouping, e.g. one computed on a different shard"""
+        if other.group_by != self.group_by:
+            raise ValueError(f'Can not merge aggregations grouped by {other.group_by} into {self.group_by}')
+        for key, group_totals in other.groups.items():
+            self.groups.setdefault(key, GroupTotals()).merge(group_totals)
+
+    def totals(self, **criteria) -> GroupTotals:
+        """Returns the combined totals of every group matching the given fields, e.g. totals(Gender='Female')"""
+        for field in criteria:
+            if field not in self.group_by:
+                raise ValueError(f'Can not filter on {field}, aggregation is grouped by {self.group_by}')
+
+        indexes = [(self.group_by.index(field), value) for field, value in criteria.items()]
+        combined_totals = GroupTotals()
+        for key, group_totals in self.groups.items():
+            if all(key[index] == value for index, value in indexes):
+                combined_totals.merge(group_totals)
+        return combined_totals
+
+    def count(self, **criteria) -> int:
+        return self.totals(**criteria).count
+
+    def to_dict(self) -> dict:
+        """Returns a json serialisable representation, group keys hold enum values instead of members"""
+        return {'group_by': list(self.group_by),
+                'groups': [[[getattr(value, 'value', value) for value in key], list(group_totals.as_tuple())]
+                           for key, group_totals in self.groups.items()]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Aggregation':
+        aggregation = cls(data['group_by'])
+        field_types = [_GROUP_FIELD_TYPES[field] for field in aggregation.group_by]
+        for key, totals in data['groups']:
+            key = tuple(field_type(value) for field_type, value in zip(field_types, key))
+            aggregation.groups[key] = GroupTotals(*totals)
+        return aggregation
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+from processing.aggregation import Aggregation
+from typing import NamedTuple, Optional
+
+CHECKPOINT_VERSION = 2
+CHECKPOINT_EXTENSION = '.checkpoint'
+
+# size of the blocks the processed prefix is read in to be hashed
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+
+
+class Checkpoint(NamedTuple):
+    offset: int
+    record_index: int
+    fingerprint: str
+    aggregation: Aggregation
+
+
+def checkpoint_path(data_file_src: str) -> str:
+    return data_file_src + CHECKPOINT_EXTENSION
+
+
+def file_fingerprint(data_file_src: str, offset: int) -> str:
+    """Hashes the first offset bytes of a file, read in blocks but not parsed.
+
+    Appending to the file leaves the fingerprint of an earlier offset unchanged, whereas truncating it or changing any
+    byte of the processed records does not."""
+    digest = hashlib.sha256(str(offset).encode())
+    with open(data_file_src, 'rb') as file:
+        remaining = offset
+        while remaining > 0:
+            block = file.read(min(remaining, FINGERPRINT_BLOCK_SIZE))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def load_checkpoint(checkpoint_src: str) -> Optional[Checkpoint]:
+    """Returns the checkpoint stored at checkpoint_src, or None if there is no usable checkpoint"""
+    try:
+        with open(checkpoint_src, 'r') as file:
+            data = json.load(file)
+        if data['version'] != CHECKPOINT_VERSION:
+            return None
+        return Checkpoint(data['offset'], data['record_index'], data['fingerprint'],
+                          Aggregation.from_dict(data['aggregation']))
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        print(f'Ignoring unreadable checkpoint {checkpoint_src} - {e}')
+        return None
+
+
+def save_checkpoint(checkpoint_src: str, checkpoint: Checkpoint) -> None:
+    """Writes a checkpoint atomically so an interrupted run never leaves a partial file behind"""
+    data = {'version': CHECKPOINT_VERSION,
+            'offset': checkpoint.offset,
+            'record_index': checkpoint.record_index,
+            'fingerprint': checkpoint.fingerprint,
+            'aggregation': checkpoint.aggregation.to_dict()}
+
+    temporary_checkpoint_src = checkpoint_src + '.tmp'
+    with open(temporary_checkpoint_src, 'w') as file:
+        json.dump(data, file)
+    os.replace(temporary_checkpoint_src, checkpoint_src)
+
+
+def is_valid_checkpoint(checkpoint: Checkpoint, data_file_src: str) -> bool:
+    """Checks the file still starts with the records the checkpoint was taken on"""
+    try:
+        if os.path.getsize(data_file_src) < checkpoint.offset:
+            return False
+        return file_fingerprint(data_file_src, checkpoint.offset) == checkpoint.fingerprint
+    except OSError:
+        return False
@@ -0,0 +1,143 @@
+import bz2
+import gzip
+import io
+import os
+import queue
+import threading
+from typing import BinaryIO, Optional, TextIO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_GZIP = 'gzip'
+CODEC_BZ2 = 'bz2'
+CODEC_ZSTD = 'zstd'
+
+CODEC_EXTENSIONS = {'.gz': CODEC_GZIP, '.bz2': CODEC_BZ2, '.zst': CODEC_ZSTD}
+_CODEC_MAGIC = {b'\x1f\x8b': CODEC_GZIP, b'BZh': CODEC_BZ2, b'\x28\xb5\x2f\xfd': CODEC_ZSTD}
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_CHUNKS = 8
+
+
+class CompressionError(ValueError):
+    """Raise when a compressed file can not be read"""
+
+
+def strip_codec_extension(data_file_src: str) -> str:
+    """Returns the path without its compression extension, e.g. data.json for data.json.gz"""
+    root, extension = os.path.splitext(data_file_src)
+    return root if extension.lower() in CODEC_EXTENSIONS else data_file_src
+
+
+def detect_codec(data_file_src: str) -> Optional[str]:
+    """Returns the codec matching the file extension or, failing that, the first bytes of the file, None for plain
+    files and files that can not be read"""
+    codec = CODEC_EXTENSIONS.get(os.path.splitext(data_file_src)[1].lower())
+    if codec is not None:
+        return codec
+    try:
+        with open(data_file_src, 'rb') as file:
+            head = file.read(4)
+    except OSError:
+        return None
+    for magic, codec in _CODEC_MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def open_decompressed(data_file_src: str, codec: str) -> BinaryIO:
+    """Returns a binary stream of the decompressed content of a file"""
+    if codec == CODEC_GZIP:
+        return gzip.open(data_file_src, 'rb')
+    if codec == CODEC_BZ2:
+        return bz2.open(data_file_src, 'rb')
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise CompressionError(f'The zstandard package is required to read {data_file_src}')
+        return zstandard.ZstdDecompressor().stream_reader(open(data_file_src, 'rb'), closefd=True)
+    raise CompressionError(f'Unknown codec {codec}, expected one of {tuple(CODEC_EXTENSIONS.values())}')
+
+
+class BackgroundDecompressor(io.RawIOBase):
+    """Binary stream decompressing a file in a background thread, ahead of the reader.
+
+    The thread fills a queue of at most max_chunks chunks of chunk_size bytes, so parsing overlaps with
+    decompression (zlib, bz2 and zstandard release the GIL) while memory stays bounded by the queue.
+    Decompression errors are raised from read as CompressionError once the chunks before them have been consumed."""
+
+    def __init__(self, data_file_src: str, codec: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_chunks: int = DEFAULT_MAX_CHUNKS):
+        super().__init__()
+        self.data_file_src = data_file_src
+        self._source = open_decompressed(data_file_src, codec)
+        self.chunk_size = chunk_size
+
+        self._queue: queue.Queue = queue.Queue(max_chunks)
+        self._stopped = threading.Event()
+        self._chunk = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._decompress, name=f'decompress {data_file_src}', daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        # wakes up regularly so closing the reader early does not leave the thread blocked on a full queue
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _decompress(self) -> None:
+        try:
+            while True:
+                chunk = self._source.read(self.chunk_size)
+                if not chunk:
+                    break
+                if not self._put(chunk):
+                    return
+            self._put(None)
+        except Exception as e:
+            # gzip, bz2 and zstandard all raise different errors on corrupted or truncated data
+            self._put(CompressionError(f'Failed to decompress {self.data_file_src} - {e!r}'))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if item is None:
+                self._eof = True
+                return 0
+            if isinstance(item, CompressionError):
+                self._eof = True
+                raise item
+            self._chunk = memoryview(item)
+
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+def open_text(data_file_src: str, codec: Optional[str] = None, encoding: str = 'utf-8') -> TextIO:
+    """Opens a plain file as text, or a compressed one as text decompressed in a background thread"""
+    if codec is None:
+        return open(data_file_src, 'r', encoding=encoding)
+    return io.TextIOWrapper(io.BufferedReader(BackgroundDecompressor(data_file_src, codec), DEFAULT_CHUNK_SIZE),
+                            encoding=encoding)
@@ -0,0 +1,237 @@
+import heapq
+import math
+from constants.bmi_units import Classification
+from processing.aggregation import GROUP_FIELDS
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_HISTOGRAM_RANGE = (10.0, 60.0)
+DEFAULT_HISTOGRAM_BINS = 50
+DEFAULT_TOP_K = 10
+
+
+class QuantileSketch(object):
+    """Mergeable quantile sketch with a relative error guarantee.
+
+    Values are counted in logarithmically sized buckets, bucket i covering (gamma^(i-1), gamma^i] with
+    gamma = (1 + relative_accuracy) / (1 - relative_accuracy), so any quantile is returned within relative_accuracy
+    of a value at that rank. Memory grows with the log of the value range, not with the number of values, and two
+    sketches with the same accuracy merge exactly. Values <= 0, e.g. the bmi of out of bounds records, are counted
+    in a single bucket returned as 0, the minimum and maximum are kept exactly."""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f'Relative accuracy must be between 0 and 1, got {relative_accuracy}')
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+        self.buckets: Dict[int, int] = {}
+        self.non_positive_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        else:
+            self.non_positive_count += 1
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(f'Can not merge a sketch with accuracy {other.relative_accuracy} '
+                             f'into one with accuracy {self.relative_accuracy}')
+        for index, bucket_count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + bucket_count
+        self.non_positive_count += other.non_positive_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns the value at quantile q between 0 and 1, None when no value was added"""
+        if not 0 <= q <= 1:
+            raise ValueError(f'Quantile must be between 0 and 1, got {q}')
+        if self.count == 0:
+            return None
+        # the exact extremes are known
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.non_positive_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                # never report beyond the extremes
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        return [self.quantile(q) for q in qs]
+
+
+class Histogram(object):
+    """Counts values in bins of equal width over [start, stop), values outside it are counted as under- or overflow"""
+
+    def __init__(self, start: float = DEFAULT_HISTOGRAM_RANGE[0], stop: float = DEFAULT_HISTOGRAM_RANGE[1],
+                 bins: int = DEFAULT_HISTOGRAM_BINS):
+        if not start < stop or bins < 1:
+            raise ValueError(f'Invalid histogram range [{start}, {stop}) with {bins} bins')
+        self.start = start
+        self.stop = stop
+        self.bins = bins
+        self._scale = bins / (stop - start)
+
+        self.counts = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+
+    @property
+    def edges(self) -> List[float]:
+        width = (self.stop - self.start) / self.bins
+        return [self.start + width * index for index in range(self.bins + 1)]
+
+    def add(self, value: float) -> None:
+        if value < self.start:
+            self.underflow += 1
+        elif value >= self.stop:
+            self.overflow += 1
+        else:
+            # min guards against rounding up to bins just below stop
+            self.counts[min(int((value - self.start) * self._scale), self.bins - 1)] += 1
+
+    def merge(self, other: 'Histogram') -> None:
+        if (other.start, other.stop, other.bins) != (self.start, self.stop, self.bins):
+            raise ValueError('Can not merge histograms with different bins')
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+
+class TopK(object):
+    """Keeps the k records with the largest, or with smallest set the smallest, bmi seen so far in a bounded heap.
+
+    Ties keep the record seen first."""
+
+    def __init__(self, k: int = DEFAULT_TOP_K, smallest: bool = False):
+        self.k = k
+        self.smallest = smallest
+        self.added = 0
+        # min heap of (signed bmi, -sequence, bmi, record), its root is the first entry to be pushed out
+        self._heap: List[tuple] = []
+
+    def add(self, bmi: float, record: dict) -> None:
+        self._push(bmi, self.added, record)
+        self.added += 1
+
+    def _push(self, bmi: float, sequence: int, record: dict) -> None:
+        entry = (-bmi if self.smallest else bmi, -sequence, bmi, record)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other: 'TopK') -> None:
+        """Adds the records of another collector as if they were seen after the records of this one"""
+        for _, order, bmi, record in other._heap:
+            self._push(bmi, self.added - order, record)
+        self.added += other.added
+
+    def items(self) -> List[Tuple[float, dict]]:
+        """Returns (bmi, record) pairs from the most to the least extreme"""
+        return [(bmi, record) for _, _, bmi, record in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class GroupDistribution(object):
+    """Quantile sketch, histogram and most extreme records of the bmi of one group"""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 histogram_range: Tuple[float, float] = DEFAULT_HISTOGRAM_RANGE,
+                 histogram_bins: int = DEFAULT_HISTOGRAM_BINS, top_k: int = DEFAULT_TOP_K):
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.histogram = Histogram(*histogram_range, histogram_bins)
+        self.largest = TopK(top_k)
+        self.smallest = TopK(top_k, smallest=True)
+
+    @property
+    def count(self) -> int:
+        return self.sketch.count
+
+    def add(self, bmi: float, record: dict) -> None:
+        self.sketch.add(bmi)
+        self.histogram.add(bmi)
+        self.largest.add(bmi, record)
+        self.smallest.add(bmi, record)
+
+    def merge(self, other: 'GroupDistribution') -> None:
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+        self.largest.merge(other.largest)
+        self.smallest.merge(other.smallest)
+
+
+class Distribution(object):
+    """Single pass bmi distribution of processed records per group, grouped like an Aggregation.
+
+    Memory is bounded by the number of groups, sketch buckets, histogram bins and top_k records per group, whatever
+    the number of records. Distributions computed on different shards or files are combined with merge, the result
+    is the same as that of a single pass over all of them except for the order of top_k ties."""
+
+    def __init__(self, group_by: Iterable[str] = ('Gender', 'BMICategory'),
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 histogram_range: Tuple[float, float] = DEFAULT_HISTOGRAM_RANGE,
+                 histogram_bins: int = DEFAULT_HISTOGRAM_BINS, top_k: int = DEFAULT_TOP_K):
+        self.group_by = tuple(group_by)
+        for field in self.group_by:
+            if field not in GROUP_FIELDS:
+                raise ValueError(f'Unknown group field {field}, expected one of {GROUP_FIELDS}')
+        self._key_indexes = tuple(GROUP_FIELDS.index(field) for field in self.group_by)
+        self._options = (relative_accuracy, tuple(histogram_range), histogram_bins, top_k)
+        self.groups: Dict[Tuple, GroupDistribution] = {}
+
+    def add(self, record: dict, bmi: float, classification: Classification) -> None:
+        values = (record['Gender'], classification.category, classification.risk)
+        key = tuple([values[index] for index in self._key_indexes])
+        group_distribution = self.groups.get(key)
+        if group_distribution is None:
+            group_distribution = self.groups[key] = GroupDistribution(*self._options)
+        group_distribution.add(bmi, record)
+
+    def merge(self, other: 'Distribution') -> None:
+        """Adds the distribution of another shard with the same grouping and options"""
+        if (other.group_by, other._options) != (self.group_by, self._options):
+            raise ValueError(f'Can not merge distributions grouped by {other.group_by} into {self.group_by}')
+        for key, group_distribution in other.groups.items():
+            if key not in self.groups:
+                self.groups[key] = GroupDistribution(*self._options)
+            self.groups[key].merge(group_distribution)
+
+    def distribution(self, **criteria) -> GroupDistribution:
+        """Returns the combined distribution of every group matching the given fields, e.g.
+        distribution(Gender='Female')"""
+        for field in criteria:
+            if field not in self.group_by:
+                raise ValueError(f'Can not filter on {field}, distribution is grouped by {self.group_by}')
+
+        indexes = [(self.group_by.index(field), value) for field, value in criteria.items()]
+        combined_distribution = GroupDistribution(*self._options)
+        for key, group_distribution in self.groups.items():
+            if all(key[index] == value for index, value in indexes):
+                combined_distribution.merge(group_distribution)
+        return combined_distribution
@@ -0,0 +1,142 @@
+import json
+from time import perf_counter
+from typing import Any, Iterator, TextIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_VALUE_TERMINATORS = _WHITESPACE + ',]'
+
+# parser states
+_EXPECT_ARRAY = 0
+_EXPECT_FIRST_VALUE = 1
+_EXPECT_VALUE = 2
+_EXPECT_DELIMITER = 3
+
+
+class JSONArrayError(ValueError):
+    """Raise when the top level JSON value is not an array"""
+
+
+class JSONArrayReader(object):
+    """Lazily yields the elements of a top level JSON array read from an open text file.
+
+    Only the element currently being decoded is kept in memory, so the cost is bounded by the size of the largest
+    element rather than the size of the file. Iterating raises json.JSONDecodeError on malformed data and
+    JSONArrayError if the document is not an array.
+
+    With resume set the file is expected to be positioned right after an element of the array, e.g. at a previously
+    recorded offset, so parsing continues with the next delimiter."""
+
+    def __init__(self, file: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = False):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.resume = resume
+
+        self._buffer = ''
+        self._consumed_bytes = 0
+        # where the buffer starts within the document, to report decoding errors against the whole document
+        self._consumed_chars = 0
+        self._consumed_lines = 0
+        self._consumed_columns = 0
+        self._last_end = None
+        self._last_end_offset = 0
+        self.read_seconds = 0.0
+
+    @property
+    def offset(self) -> int:
+        """Number of utf-8 encoded bytes read up to the end of the last yielded element, only exact for a file opened
+        with newline='' as translating \r\n to \n would drop a byte per line"""
+        if self._last_end is None:
+            return self._last_end_offset
+        return self._consumed_bytes + len(self._buffer[:self._last_end].encode('utf-8'))
+
+    def _refill(self, pos: int) -> bool:
+        """Drops the consumed part of the buffer and reads the next chunk, returns False at the end of the file"""
+        if self._last_end is not None:
+            self._last_end_offset = self.offset
+            self._last_end = None
+        consumed = self._buffer[:pos]
+        self._consumed_bytes += len(consumed.encode('utf-8'))
+        self._consumed_chars += pos
+        newlines = consumed.count('\n')
+        if newlines:
+            self._consumed_lines += newlines
+            self._consumed_columns = pos - consumed.rindex('\n') - 1
+        else:
+            self._consumed_columns += pos
+
+        start = perf_counter()
+        chunk = self.file.read(self.chunk_size)
+        self.read_seconds += perf_counter() - start
+        self._buffer = self._buffer[pos:] + chunk
+        return bool(chunk)
+
+    def _locate(self, error: json.JSONDecodeError) -> json.JSONDecodeError:
+        """Moves an error raised on the buffer to its position within the whole document"""
+        if error.lineno == 1:
+            error.colno += self._consumed_columns
+        error.lineno += self._consumed_lines
+        error.pos += self._consumed_chars
+        error.args = (f'{error.msg}: line {error.lineno} column {error.colno} (char {error.pos})',)
+        return error
+
+    def __iter__(self) -> Iterator[Any]:
+        decoder = json.JSONDecoder()
+        pos = 0
+        eof = False
+        state = _EXPECT_DELIMITER if self.resume else _EXPECT_ARRAY
+
+        while True:
+            buffer = self._buffer
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+
+            if pos == len(buffer):
+                if eof:
+                    raise self._locate(json.JSONDecodeError('Unexpected end of data', buffer, pos))
+                eof = not self._refill(pos)
+                pos = 0
+                continue
+
+            char = buffer[pos]
+
+            if state == _EXPECT_ARRAY:
+                if char != '[':
+                    raise JSONArrayError(f'Expected a JSON array but found {char!r}')
+                state = _EXPECT_FIRST_VALUE
+                pos += 1
+                continue
+
+            if char == ']' and state in (_EXPECT_FIRST_VALUE, _EXPECT_DELIMITER):
+                return
+
+            if state == _EXPECT_DELIMITER:
+                if char != ',':
+                    raise self._locate(json.JSONDecodeError("Expecting ',' delimiter", buffer, pos))
+                state = _EXPECT_VALUE
+                pos += 1
+                continue
+
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise self._locate(e)
+                end = None
+
+            # a value not followed by a delimiter may be truncated (e.g. a number split across chunks) so read more first
+            if not eof and (end is None or end == len(buffer) or buffer[end] not in _VALUE_TERMINATORS):
+                eof = not self._refill(pos)
+                pos = 0
+                continue
+
+            self._last_end = end
+            yield value
+            pos = end
+            state = _EXPECT_DELIMITER
+
+
+def iter_json_array(file: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Lazily yields the elements of a top level JSON array read from an open text file, see JSONArrayReader"""
+    return iter(JSONArrayReader(file, chunk_size))
@@ -0,0 +1,125 @@
+import logging
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger('bmi')
+
+SKIP_MISSING_KEY = 'missing_key'
+SKIP_HEIGHT_TYPE = 'height_type'
+SKIP_WEIGHT_TYPE = 'weight_type'
+SKIP_ZERO_HEIGHT = 'zero_height'
+SKIP_OUT_OF_BOUNDS = 'out_of_bounds'
+SKIP_NOT_A_RECORD = 'not_a_record'
+SKIP_NOT_FINITE = 'not_finite'
+SKIP_GENDER_TYPE = 'gender_type'
+# ndjson lines that can not be decoded and csv lines with too many columns
+SKIP_MALFORMED = 'malformed'
+SKIP_REASONS = (SKIP_MISSING_KEY, SKIP_HEIGHT_TYPE, SKIP_WEIGHT_TYPE, SKIP_ZERO_HEIGHT, SKIP_OUT_OF_BOUNDS,
+                SKIP_NOT_A_RECORD, SKIP_NOT_FINITE, SKIP_MALFORMED, SKIP_GENDER_TYPE)
+
+STAGE_READ = 'read'
+STAGE_PARSE = 'parse'
+STAGE_VALIDATE = 'validate'
+STAGE_COMPUTE = 'compute'
+STAGE_CLASSIFY = 'classify'
+STAGES = (STAGE_READ, STAGE_PARSE, STAGE_VALIDATE, STAGE_COMPUTE, STAGE_CLASSIFY)
+
+DEFAULT_LOG_FIRST = 10
+DEFAULT_LOG_EVERY = 10000
+
+# called with the reason, the index of the record within its input and the record itself
+SkipHook = Callable[[str, int, object], None]
+
+
+class SampledLogger(object):
+    """Logs the first log_first messages of every reason, then only one in every log_every of them"""
+
+    def __init__(self, log_first: int = DEFAULT_LOG_FIRST, log_every: int = DEFAULT_LOG_EVERY,
+                 log: logging.Logger = logger):
+        self.log_first = log_first
+        self.log_every = log_every
+        self.log = log
+
+    def should_log(self, occurrence: int) -> bool:
+        """occurrence counts from 1 for the first message of a reason"""
+        return occurrence <= self.log_first or self.log_every > 0 and (occurrence - self.log_first) % self.log_every == 0
+
+    def warning(self, occurrence: int, message: str) -> None:
+        if self.should_log(occurrence):
+            if occurrence > self.log_first:
+                message = f'{message} ({occurrence} so far, logging 1 in {self.log_every})'
+            self.log.warning(message)
+
+
+class ProcessingStats(object):
+    """Counters and stage timings of a processing run, passed to and filled in by the DataProcessor entry points.
+
+    Skipped records are counted per reason and handed to the optional on_skip hook, their warnings go through a
+    SampledLogger rather than one line per record. Stage timing costs a few clock reads per record so it is only
+    collected when timed is set; read time is only told apart from parse time for json arrays."""
+
+    def __init__(self, timed: bool = False, on_skip: Optional[SkipHook] = None,
+                 sampled_logger: Optional[SampledLogger] = None):
+        self.timed = timed
+        self.on_skip = on_skip
+        self.sampled_logger = sampled_logger or SampledLogger()
+
+        self.records_read = 0
+        self.accepted = 0
+        self.out_of_bounds = 0
+        self.skipped: Dict[str, int] = dict.fromkeys(SKIP_REASONS, 0)
+        self.stage_seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+
+    @property
+    def skipped_total(self) -> int:
+        return sum(self.skipped.values())
+
+    def skip(self, reason: str, person_data, message: str) -> None:
+        self.skipped[reason] = occurrence = self.skipped.get(reason, 0) + 1
+        if self.on_skip is not None:
+            self.on_skip(reason, self.records_read - 1, person_data)
+        self.sampled_logger.warning(occurrence, message)
+
+    def add_read_time(self, seconds: float) -> None:
+        """Moves time spent reading the input out of the parse stage it was measured in"""
+        self.stage_seconds[STAGE_READ] += seconds
+        self.stage_seconds[STAGE_PARSE] -= seconds
+
+    def timed_iter(self, iterable: Iterable, stage: str) -> Iterator:
+        """Yields from iterable, adding the time spent waiting for every item to stage"""
+        iterator = iter(iterable)
+        stage_seconds = self.stage_seconds
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage_seconds[stage] += perf_counter() - start
+                return
+            stage_seconds[stage] += perf_counter() - start
+            yield item
+
+    def merge(self, other: 'ProcessingStats') -> None:
+        """Adds the counters and timings of another run, e.g. one done by a worker process"""
+        self.records_read += other.records_read
+        self.accepted += other.accepted
+        self.out_of_bounds += other.out_of_bounds
+        for reason, count in other.skipped.items():
+            self.skipped[reason] = self.skipped.get(reason, 0) + count
+        for stage, seconds in other.stage_seconds.items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        return {'records_read': self.records_read, 'accepted': self.accepted, 'out_of_bounds': self.out_of_bounds,
+                'skipped': dict(self.skipped), 'stage_seconds': dict(self.stage_seconds)}
+
+    def __getstate__(self) -> dict:
+        # hooks and loggers stay behind when stats are sent back from a worker process
+        state = self.__dict__.copy()
+        state['on_skip'] = None
+        state['sampled_logger'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.sampled_logger = SampledLogger()
@@ -0,0 +1,184 @@
+import csv
+import json
+import mmap
+import os
+from processing.compression import CODEC_EXTENSIONS, strip_codec_extension
+from processing.metrics import ProcessingStats, SKIP_MALFORMED
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+FORMAT_JSON = 'json'
+FORMAT_NDJSON = 'ndjson'
+FORMAT_CSV = 'csv'
+
+FORMATS = (FORMAT_JSON, FORMAT_NDJSON, FORMAT_CSV)
+LINE_FORMATS = (FORMAT_NDJSON, FORMAT_CSV)
+
+FORMAT_EXTENSIONS = {'.json': FORMAT_JSON, '.ndjson': FORMAT_NDJSON, '.jsonl': FORMAT_NDJSON, '.csv': FORMAT_CSV}
+# extensions of the files picked up from input directories, plain or compressed
+INPUT_EXTENSIONS = tuple(FORMAT_EXTENSIONS) + tuple(format_extension + codec_extension
+                                                   for format_extension in FORMAT_EXTENSIONS
+                                                   for codec_extension in CODEC_EXTENSIONS)
+
+
+class FormatError(ValueError):
+    """Raise when the format of an input file is unknown"""
+
+
+def detect_format(data_file_src: str, data_format: Optional[str] = None) -> str:
+    """Returns the explicitly requested format, or the one matching the file extension, defaulting to json.
+    Compression extensions are ignored, e.g. data.csv.gz is a csv file"""
+    if data_format is not None:
+        if data_format not in FORMATS:
+            raise FormatError(f'Unknown format {data_format}, expected one of {FORMATS}')
+        return data_format
+    return FORMAT_EXTENSIONS.get(os.path.splitext(strip_codec_extension(data_file_src))[1].lower(), FORMAT_JSON)
+
+
+def _iter_lines(data_file_src: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """Yields the offset and content of every non blank line starting within [start, end) of a memory mapped file.
+
+    Only the current line is copied out of the mapping, start must be the beginning of a line."""
+    if os.path.getsize(data_file_src) == 0:
+        return
+
+    with open(data_file_src, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        end = len(buffer) if end is None else end
+        position = start
+        while position < end:
+            line_end = buffer.find(b'\n', position)
+            if line_end == -1:
+                line_end = len(buffer)
+            line = buffer[position:line_end].strip()
+            if line:
+                yield position, line
+            position = line_end + 1
+
+
+def complete_lines_end(data_file_src: str) -> int:
+    """Returns the offset right after the last newline of a file, a last line without one may still be written"""
+    if os.path.getsize(data_file_src) == 0:
+        return 0
+    with open(data_file_src, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return buffer.rfind(b'\n') + 1
+
+
+def split_lines(data_file_src: str, shard_bytes: int) -> List[Tuple[int, int]]:
+    """Splits a file into byte ranges of roughly shard_bytes each, every range ending on a line boundary"""
+    size = os.path.getsize(data_file_src)
+    if size == 0:
+        return []
+
+    shards = []
+    with open(data_file_src, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        start = 0
+        while start < size:
+            line_end = buffer.find(b'\n', min(start + shard_bytes, size) - 1)
+            end = size if line_end == -1 else line_end + 1
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def _skip_malformed(stats: ProcessingStats, raw_data: str, message: str) -> None:
+    """Counts a line that does not hold a record as read and skipped, so on_skip hooks see it like any other"""
+    stats.records_read += 1
+    stats.skip(SKIP_MALFORMED, raw_data, message)
+
+
+def iter_ndjson_records(data_file_src: str, start: int = 0, end: Optional[int] = None,
+                        stats: Optional[ProcessingStats] = None) -> Iterator[dict]:
+    """Yields the records of a newline delimited json file, lines that can not be decoded are skipped as malformed"""
+    stats = stats if stats is not None else ProcessingStats()
+    for position, line in _iter_lines(data_file_src, start, end):
+        try:
+            yield json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            _skip_malformed(stats, line.decode('utf-8', 'replace'),
+                            f'Failed to decode JSON data in {data_file_src} at byte {position}.. skipping - {e}')
+
+
+def _parse_csv_value(value: str):
+    for number_type in (int, float):
+        try:
+            return number_type(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _read_csv_header(data_file_src: str) -> Tuple[Optional[List[str]], int]:
+    """Returns the column names of a csv file and the offset of its first data line"""
+    with open(data_file_src, 'rb') as file:
+        for line in iter(file.readline, b''):
+            if line.strip():
+                return next(csv.reader([line.decode('utf-8').strip()])), file.tell()
+    return None, 0
+
+
+def iter_csv_records(data_file_src: str, start: int = 0, end: Optional[int] = None,
+                     stats: Optional[ProcessingStats] = None) -> Iterator[dict]:
+    """Yields the records of a csv file with a header line, e.g. Gender,HeightCm,WeightKg.
+
+    Numeric values are converted to int or float, empty values are left out of the record so they are treated as
+    missing, lines with more values than columns are skipped as malformed. A range starting at 0 skips the header,
+    other ranges read it separately from the start of the file."""
+    stats = stats if stats is not None else ProcessingStats()
+    header, data_start = _read_csv_header(data_file_src)
+    if header is None:
+        return
+
+    for position, line in _iter_lines(data_file_src, max(start, data_start), end):
+        text = line.decode('utf-8')
+        values = next(csv.reader([text])) if '"' in text else text.split(',')
+        if len(values) > len(header):
+            _skip_malformed(stats, text, f'Unexpected number of columns found in {data_file_src} at byte {position}'
+                                         f'.. skipping - {text}')
+            continue
+        yield {key: _parse_csv_value(value) for key, value in zip(header, values) if value != ''}
+
+
+def iter_ndjson_stream(file: TextIO, data_file_src: str, stats: Optional[ProcessingStats] = None) -> Iterator[dict]:
+    """Yields the records of newline delimited json read from an open text stream, e.g. a decompressed file"""
+    stats = stats if stats is not None else ProcessingStats()
+    for line_number, line in enumerate(file, 1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                _skip_malformed(stats, line,
+                                f'Failed to decode JSON data in {data_file_src} at line {line_number}.. skipping - {e}')
+
+
+def iter_csv_stream(file: TextIO, data_file_src: str, stats: Optional[ProcessingStats] = None) -> Iterator[dict]:
+    """Yields the records of a csv file read from an open text stream, see iter_csv_records"""
+    stats = stats if stats is not None else ProcessingStats()
+    lines: Iterable[str] = (line for line in file if line.strip())
+    header = None
+    for values in csv.reader(lines):
+        if header is None:
+            header = values
+            continue
+        if len(values) > len(header):
+            text = ','.join(values)
+            _skip_malformed(stats, text, f'Unexpected number of columns found in {data_file_src}.. skipping - {text}')
+            continue
+        yield {key: _parse_csv_value(value) for key, value in zip(header, values) if value != ''}
+
+
+def iter_stream_records(file: TextIO, data_format: str, data_file_src: str,
+                        stats: Optional[ProcessingStats] = None) -> Iterator[dict]:
+    if data_format == FORMAT_NDJSON:
+        return iter_ndjson_stream(file, data_file_src, stats)
+    if data_format == FORMAT_CSV:
+        return iter_csv_stream(file, data_file_src, stats)
+    raise FormatError(f'{data_format} is not a line oriented format')
+
+
+def iter_line_records(data_file_src: str, data_format: str, start: int = 0, end: Optional[int] = None,
+                      stats: Optional[ProcessingStats] = None) -> Iterator[dict]:
+    if data_format == FORMAT_NDJSON:
+        return iter_ndjson_records(data_file_src, start, end, stats)
+    if data_format == FORMAT_CSV:
+        return iter_csv_records(data_file_src, start, end, stats)
+    raise FormatError(f'{data_format} is not a line oriented format')
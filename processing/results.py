@@ -0,0 +1,91 @@
+from array import array
+from constants.bmi_units import Classification, DEFAULT_CLASSIFIER, ThresholdClassifier
+from typing import Dict, Iterator, List, NamedTuple
+
+
+class ResultRow(NamedTuple):
+    gender: str
+    height: float
+    weight: float
+    bmi: float
+    category: int
+    risk: int
+
+
+def _restore_number(value: float):
+    """Integral values are handed back as int so exported records match their input"""
+    return int(value) if value.is_integer() else value
+
+
+class ResultStore(object):
+    """Columnar container for processed records.
+
+    Numeric columns are held in typed arrays and gender, category and risk as small integer codes, their labels are
+    kept once in shared tables. Rows can be iterated or exported back to dicts on demand. Only the fields produced by
+    processing are stored, any other keys of the input records are dropped."""
+
+    def __init__(self, classifier: ThresholdClassifier = DEFAULT_CLASSIFIER):
+        self.genders: List[str] = []
+        self._gender_codes: Dict[str, int] = {}
+
+        self.category_labels = {band.category.value: band.category_text for band in classifier.bands}
+        self.risk_labels = {band.risk.value: band.risk_text for band in classifier.bands}
+
+        self.gender = array('I')
+        self.height = array('d')
+        self.weight = array('d')
+        self.bmi = array('d')
+        self.category = array('b')
+        self.risk = array('b')
+
+    def __len__(self) -> int:
+        return len(self.bmi)
+
+    def __iter__(self) -> Iterator[ResultRow]:
+        genders = self.genders
+        for row in zip(self.gender, self.height, self.weight, self.bmi, self.category, self.risk):
+            yield ResultRow(genders[row[0]], *row[1:])
+
+    def _gender_code(self, gender: str) -> int:
+        code = self._gender_codes.get(gender)
+        if code is None:
+            code = self._gender_codes[gender] = len(self.genders)
+            self.genders.append(gender)
+        return code
+
+    def append(self, gender: str, height: float, weight: float, bmi: float, classification: Classification) -> None:
+        self.gender.append(self._gender_code(gender))
+        self.height.append(height)
+        self.weight.append(weight)
+        self.bmi.append(bmi)
+        self.category.append(classification.category.value)
+        self.risk.append(classification.risk.value)
+
+    def extend(self, other: 'ResultStore') -> None:
+        """Appends all rows of another store, e.g. one filled from a different shard"""
+        if other.category_labels != self.category_labels or other.risk_labels != self.risk_labels:
+            raise ValueError('Can not merge result stores using different classifiers')
+
+        gender_codes = [self._gender_code(gender) for gender in other.genders]
+        self.gender.extend(gender_codes[code] for code in other.gender)
+        self.height.extend(other.height)
+        self.weight.extend(other.weight)
+        self.bmi.extend(other.bmi)
+        self.category.extend(other.category)
+        self.risk.extend(other.risk)
+
+    def to_dict(self, index: int) -> dict:
+        return {'Gender': self.genders[self.gender[index]],
+                'HeightCm': _restore_number(self.height[index]),
+                'WeightKg': _restore_number(self.weight[index]),
+                'BMI': self.bmi[index],
+                'BMICategory': self.category_labels[self.category[index]],
+                'HealthRisk': self.risk_labels[self.risk[index]]}
+
+    def iter_dicts(self) -> Iterator[dict]:
+        """Lazily exports rows in the same format as DataProcessor.iter_records"""
+        for index in range(len(self)):
+            yield self.to_dict(index)
+
+    def to_dicts(self) -> list:
+        return list(self.iter_dicts())
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from time import perf_counter
+from constants.bmi_units import Classification
+from processing.metrics import STAGE_COMPUTE
+from typing import Dict, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = 64 * 1024
+
+
+class ScoringCache(object):
+    """Bounded least recently used cache of the bmi and classification of (weight, height, in_cm, decimal_places).
+
+    Inputs repeat the same few thousand height/weight pairs, so most records are scored with a single lookup. Once
+    max_size pairs are cached the least recently used one is evicted. Entries depend on the bounds and classifier of
+    the calculator, call clear after changing them."""
+
+    def __init__(self, bmi_calculator, max_size: int = DEFAULT_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError(f'Cache size must be at least 1, got {max_size}')
+        self.bmi_calculator = bmi_calculator
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[tuple, Tuple[float, Classification]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def score(self, mass_kg: float, height: float, in_cm=True, decimal_places=2,
+              stage_seconds: Optional[Dict[str, float]] = None) -> Tuple[float, Classification]:
+        """See BMICalculator.score, a hit computes and classifies in one lookup so its time counts as compute"""
+        if stage_seconds is not None:
+            start = perf_counter()
+        key = (mass_kg, height, in_cm, decimal_places)
+        entries = self._entries
+        entry = entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            if stage_seconds is not None:
+                stage_seconds[STAGE_COMPUTE] += perf_counter() - start
+            return entry
+
+        self.misses += 1
+        entry = entries[key] = self.bmi_calculator.calculate_and_classify(mass_kg, height, in_cm, decimal_places,
+                                                                          stage_seconds)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def evict(self, mass_kg: float, height: float, in_cm=True, decimal_places=2) -> bool:
+        """Removes a single entry, returns False if it was not cached"""
+        return self._entries.pop((mass_kg, height, in_cm, decimal_places), None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def as_dict(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self._entries),
+                'max_size': self.max_size}
@@ -0,0 +1,82 @@
+import mmap
+import os
+import re
+from typing import Iterable, Iterator, List, Tuple, Union
+
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_FLAT_OBJECT = rb'\{[^{}\[\]"]*(?:' + _STRING + rb'[^{}\[\]"]*)*\}'
+_SCALAR = rb'-?[0-9][0-9eE.+-]*|true|false|null'
+
+# strings and objects without nested containers are matched whole so flat records cost a single match
+_TOKEN = re.compile(_FLAT_OBJECT + b'|' + _STRING + rb'|[\[\]{},]')
+# a run of top level elements that are each followed by a delimiter, consumed with a single match
+_ELEMENT_RUN = re.compile(rb'(?:\s*(?:' + _FLAT_OBJECT + b'|' + _STRING + b'|' + _SCALAR + rb')\s*,){1,4096}')
+
+_QUOTE = ord('"')
+_OPENING, _CLOSING = (ord('['), ord('{')), (ord(']'), ord('}'))
+
+
+class ShardingError(ValueError):
+    """Raise when a file can not be split into record aligned shards"""
+
+
+def iter_input_files(paths_or_dir: Union[str, Iterable[str]], extensions: Tuple[str, ...] = ('.json',)) -> Iterator[str]:
+    """Yields the given file paths in order, directories are expanded to their matching files sorted by name"""
+    if isinstance(paths_or_dir, (str, os.PathLike)):
+        paths_or_dir = [paths_or_dir]
+
+    for path in paths_or_dir:
+        if os.path.isdir(path):
+            for file_name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, file_name)
+                if os.path.isfile(file_path) and file_name.endswith(extensions):
+                    yield file_path
+        else:
+            yield path
+
+
+def split_json_array(data_file_src: str, shard_bytes: int = DEFAULT_SHARD_BYTES) -> List[Tuple[int, int]]:
+    """Splits the top level JSON array of a file into byte ranges of roughly shard_bytes each.
+
+    Every range starts and ends on a top level delimiter so it holds whole, comma separated elements which can be
+    parsed independently by wrapping them in brackets. The file is scanned through mmap without being decoded."""
+    if os.path.getsize(data_file_src) == 0:
+        raise ShardingError(f'{data_file_src} is empty')
+
+    shards = []
+    with open(data_file_src, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        first_token = re.compile(rb'\s*\[').match(buffer)
+        if first_token is None:
+            raise ShardingError(f'{data_file_src} does not hold a JSON array')
+
+        depth = 1
+        position = shard_start = first_token.end()
+        while True:
+            if depth == 1:
+                element_run = _ELEMENT_RUN.match(buffer, position)
+                if element_run is not None:
+                    position = element_run.end()
+                    if position - 1 - shard_start >= shard_bytes:
+                        shards.append((shard_start, position - 1))
+                        shard_start = position
+                    continue
+
+            token = _TOKEN.search(buffer, position)
+            if token is None:
+                raise ShardingError(f'Unterminated JSON array in {data_file_src}')
+            start, position = token.span()
+            char = buffer[start]
+            if char == _QUOTE or position - start > 1:
+                continue
+            if char in _OPENING:
+                depth += 1
+            elif char in _CLOSING:
+                depth -= 1
+                if depth == 0:
+                    shards.append((shard_start, start))
+                    return shards
+            elif depth == 1 and start - shard_start >= shard_bytes:
+                shards.append((shard_start, start))
+                shard_start = position
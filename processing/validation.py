@@ -0,0 +1,142 @@
+import json
+from processing.metrics import SKIP_GENDER_TYPE, SKIP_HEIGHT_TYPE, SKIP_MISSING_KEY, SKIP_NOT_A_RECORD
+from processing.metrics import SKIP_OUT_OF_BOUNDS
+from processing.metrics import SKIP_NOT_FINITE, SKIP_WEIGHT_TYPE, SKIP_ZERO_HEIGHT
+from typing import Callable, IO, List, NamedTuple, Optional, Sequence, Tuple
+
+NUMERIC_TYPES = (int, float)
+
+# returns None for a valid record, otherwise the reason it is rejected
+Validator = Callable[[object], Optional[str]]
+
+
+class FieldRule(NamedTuple):
+    name: str
+    types: Tuple[type, ...]
+    type_reason: str
+    minimum: float = float('-inf')
+    maximum: float = float('inf')
+    nonzero_reason: Optional[str] = None
+
+
+class RecordSchema(object):
+    """Declarative description of a valid input record, compiled once into a single validator function.
+
+    Every required field must be present, every rule checks the exact type of a field (bool is not a number), that it
+    is finite where floats are allowed (json allows NaN and Infinity), that it is not zero where nonzero_reason is
+    given and, with reject_out_of_bounds set, that it lies within its range where one is given.
+    Checks run in that order across all rules so the first failing one gives the reason."""
+
+    def __init__(self, required_fields: Sequence[str] = ('Gender', 'HeightCm', 'WeightKg'),
+                 rules: Sequence[FieldRule] = (), reject_out_of_bounds: bool = False):
+        self.required_fields = tuple(required_fields)
+        self.rules = tuple(rules)
+        self.reject_out_of_bounds = reject_out_of_bounds
+
+    @classmethod
+    def from_calculator(cls, bmi_calculator, required_fields: Sequence[str] = ('Gender', 'HeightCm', 'WeightKg'),
+                        numeric_types: Tuple[type, ...] = NUMERIC_TYPES,
+                        reject_out_of_bounds: bool = False) -> 'RecordSchema':
+        """Builds the schema of records in cm and kg, taking the ranges from the calculator's min/max bounds. A
+        required Gender must be a string, it is used as a group and partition key."""
+        rules = [FieldRule('Gender', (str,), SKIP_GENDER_TYPE)] if 'Gender' in required_fields else []
+        rules += [FieldRule('HeightCm', numeric_types, SKIP_HEIGHT_TYPE, bmi_calculator.min_height_m,
+                            bmi_calculator.max_height_m, SKIP_ZERO_HEIGHT),
+                  FieldRule('WeightKg', numeric_types, SKIP_WEIGHT_TYPE, bmi_calculator.min_weight_kg,
+                            bmi_calculator.max_weight_kg)]
+        return cls(required_fields, rules, reject_out_of_bounds)
+
+    def compile(self) -> Validator:
+        """Generates the source of a validator with every check inlined and its constants bound as globals"""
+        namespace = {}
+        lines = ['def validate(person_data):',
+                 '    if type(person_data) is not dict:',
+                 f'        return {SKIP_NOT_A_RECORD!r}']
+        if self.required_fields:
+            missing = ' or '.join(f'{field!r} not in person_data' for field in self.required_fields)
+            lines += [f'    if {missing}:', f'        return {SKIP_MISSING_KEY!r}']
+
+        for index, rule in enumerate(self.rules):
+            namespace[f'types_{index}'] = rule.types
+            if rule.name not in self.required_fields:
+                lines += [f'    if {rule.name!r} not in person_data:', f'        return {SKIP_MISSING_KEY!r}']
+            lines += [f'    value_{index} = person_data[{rule.name!r}]',
+                      f'    if type(value_{index}) not in types_{index}:',
+                      f'        return {rule.type_reason!r}']
+        for index, rule in enumerate(self.rules):
+            if float in rule.types:
+                # inf - inf and anything involving nan are nan, which is not equal to 0
+                lines += [f'    if value_{index} - value_{index} != 0:', f'        return {SKIP_NOT_FINITE!r}']
+        for index, rule in enumerate(self.rules):
+            if rule.nonzero_reason is not None:
+                lines += [f'    if value_{index} == 0:', f'        return {rule.nonzero_reason!r}']
+        if self.reject_out_of_bounds:
+            for index, rule in enumerate(self.rules):
+                if rule.minimum == float('-inf') and rule.maximum == float('inf'):
+                    continue
+                namespace[f'minimum_{index}'], namespace[f'maximum_{index}'] = rule.minimum, rule.maximum
+                lines += [f'    if not minimum_{index} <= value_{index} <= maximum_{index}:',
+                          f'        return {SKIP_OUT_OF_BOUNDS!r}']
+        lines.append('    return None')
+
+        exec(compile('\n'.join(lines), '<record schema>', 'exec'), namespace)
+        return namespace['validate']
+
+
+def describe_rejection(reason: str, person_data) -> str:
+    """Returns a human readable warning for a rejected record"""
+    if reason == SKIP_HEIGHT_TYPE:
+        return f"Warning - unexpected type {type(person_data['HeightCm'])} found for height, should be int or float"
+    if reason == SKIP_WEIGHT_TYPE:
+        return f"Warning - unexpected type {type(person_data['WeightKg'])} found for weight, should be int or float"
+    if reason == SKIP_ZERO_HEIGHT:
+        return f'Incomplete data found for weight or height.. skipping - {person_data}'
+    if reason == SKIP_OUT_OF_BOUNDS:
+        return f'Out of bounds data found for weight or height.. skipping - {person_data}'
+    if reason == SKIP_GENDER_TYPE:
+        return f"Warning - unexpected type {type(person_data['Gender'])} found for gender, should be str"
+    if reason == SKIP_NOT_FINITE:
+        return f'Non finite value found for weight or height.. skipping - {person_data}'
+    if reason == SKIP_NOT_A_RECORD:
+        return f'Unexpected value found instead of a record.. skipping - {person_data!r}'
+    return f'Incomplete data found for current record.. skipping - {person_data}'
+
+
+class RejectedRecord(NamedTuple):
+    index: int
+    reason: str
+    record: object
+
+
+class ListErrorSink(object):
+    """Collects rejected records in memory, pass it as the on_skip hook of a ProcessingStats"""
+
+    def __init__(self):
+        self.rejected: List[RejectedRecord] = []
+
+    def __call__(self, reason: str, index: int, person_data) -> None:
+        self.rejected.append(RejectedRecord(index, reason, person_data))
+
+    def records(self) -> list:
+        return [rejected_record.record for rejected_record in self.rejected]
+
+
+class FileErrorSink(object):
+    """Writes rejected records as ndjson lines of {"index", "reason", "record"} so they can be replayed later,
+    pass it as the on_skip hook of a ProcessingStats and close it once processing is done"""
+
+    def __init__(self, error_file_src: str):
+        self.error_file_src = error_file_src
+        self._file: IO = open(error_file_src, 'w')
+
+    def __call__(self, reason: str, index: int, person_data) -> None:
+        self._file.write(json.dumps({'index': index, 'reason': reason, 'record': person_data}) + '\n')
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'FileErrorSink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
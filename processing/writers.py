@@ -0,0 +1,251 @@
+import abc
+import csv
+import json
+import os
+import re
+from collections import OrderedDict
+from processing.readers import detect_format, FORMAT_CSV, FORMAT_JSON, FORMAT_NDJSON
+from typing import Dict, IO, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_PARTITION_BUFFER_SIZE = 64 * 1024
+DEFAULT_MAX_OPEN_FILES = 32
+
+_UNSAFE_FILE_NAME_CHARS = re.compile(r'[^A-Za-z0-9.-]+')
+
+
+def _escape_file_name(name: str) -> str:
+    """Percent-encodes every character outside letters, digits, '.' and '-', so distinct names stay distinct"""
+    return _UNSAFE_FILE_NAME_CHARS.sub(
+        lambda match: ''.join(f'%{byte:02X}' for byte in match.group().encode('utf-8')), name)
+
+
+class BufferedTextOutput(object):
+    """Collects encoded pieces of text in memory and writes them to the file in one call once buffer_size characters
+    are pending, so writing a record costs an append rather than a write call"""
+
+    def __init__(self, file: IO, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.file = file
+        self.buffer_size = buffer_size
+        self._pending: List[str] = []
+        self._pending_size = 0
+
+    def write(self, text: str) -> None:
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self.file.write(''.join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+
+class RecordWriter(abc.ABC):
+    """Streams records to a file as they are produced, only the pending part of the output is kept in memory.
+
+    Records are encoded one at a time, call close or use the writer as a context manager to complete the file."""
+
+    def __init__(self, output_file_src: str, buffer_size: int = DEFAULT_BUFFER_SIZE, file: Optional[IO] = None):
+        self.output_file_src = output_file_src
+        self.records_written = 0
+        self._file: IO = file if file is not None else open(output_file_src, 'w', encoding='utf-8', newline='')
+        self._output = BufferedTextOutput(self._file, buffer_size)
+
+    @abc.abstractmethod
+    def _encode(self, record: dict) -> None:
+        """Writes a single record to the output"""
+
+    def _finish(self) -> None:
+        pass
+
+    def write(self, record: dict) -> None:
+        self._encode(record)
+        self.records_written += 1
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        """Writes every record of an iterable, returns the number of records written"""
+        written = self.records_written
+        for record in records:
+            self.write(record)
+        return self.records_written - written
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._finish()
+            self._output.flush()
+            self._file.close()
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class JSONArrayWriter(RecordWriter):
+    """Writes records as the elements of a single top level json array"""
+
+    def __init__(self, output_file_src: str, buffer_size: int = DEFAULT_BUFFER_SIZE, file: Optional[IO] = None):
+        super().__init__(output_file_src, buffer_size, file)
+        self._encoder = json.JSONEncoder(ensure_ascii=False)
+        self._output.write('[')
+
+    def _encode(self, record: dict) -> None:
+        self._output.write(',\n' if self.records_written else '\n')
+        self._output.write(self._encoder.encode(record))
+
+    def _finish(self) -> None:
+        self._output.write('\n]\n' if self.records_written else ']\n')
+
+
+class NDJSONWriter(RecordWriter):
+    """Writes every record as one line of json"""
+
+    def __init__(self, output_file_src: str, buffer_size: int = DEFAULT_BUFFER_SIZE, file: Optional[IO] = None):
+        super().__init__(output_file_src, buffer_size, file)
+        self._encoder = json.JSONEncoder(ensure_ascii=False)
+
+    def _encode(self, record: dict) -> None:
+        self._output.write(self._encoder.encode(record))
+        self._output.write('\n')
+
+
+class CSVWriter(RecordWriter):
+    """Writes records as csv lines under a header line, the columns are given or taken from the first record.
+
+    Keys missing from a record are left empty, keys not among the columns are left out."""
+
+    def __init__(self, output_file_src: str, buffer_size: int = DEFAULT_BUFFER_SIZE, file: Optional[IO] = None,
+                 fieldnames: Optional[Sequence[str]] = None):
+        super().__init__(output_file_src, buffer_size, file)
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def _encode(self, record: dict) -> None:
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(record)
+            self._writer = csv.DictWriter(self._output, self.fieldnames, extrasaction='ignore', lineterminator='\n')
+            self._writer.writeheader()
+        self._writer.writerow(record)
+
+    def _finish(self) -> None:
+        if self._writer is None and self.fieldnames is not None:
+            csv.writer(self._output, lineterminator='\n').writerow(self.fieldnames)
+
+
+WRITERS = {FORMAT_JSON: JSONArrayWriter, FORMAT_NDJSON: NDJSONWriter, FORMAT_CSV: CSVWriter}
+
+
+def open_writer(output_file_src: str, output_format: Optional[str] = None,
+                buffer_size: int = DEFAULT_BUFFER_SIZE) -> RecordWriter:
+    """Returns the writer of the requested format, or the one matching the file extension, defaulting to json"""
+    return WRITERS[detect_format(output_file_src, output_format)](output_file_src, buffer_size)
+
+
+class _PartitionFile(object):
+    """File of a single partition, opened on write and closed again when other partitions need its handle"""
+
+    def __init__(self, output_file_src: str, handles: 'OrderedDict[str, IO]', max_open_files: int):
+        self.output_file_src = output_file_src
+        self.closed = False
+        self._handles = handles
+        self._max_open_files = max_open_files
+        self._created = False
+
+    def write(self, text: str) -> None:
+        handles = self._handles
+        handle = handles.pop(self.output_file_src, None)
+        if handle is None:
+            while len(handles) >= self._max_open_files:
+                handles.popitem(last=False)[1].close()
+            handle = open(self.output_file_src, 'a' if self._created else 'w', encoding='utf-8', newline='')
+            self._created = True
+        # the most recently written file is the last one to be closed
+        handles[self.output_file_src] = handle
+        handle.write(text)
+
+    def close(self) -> None:
+        handle = self._handles.pop(self.output_file_src, None)
+        if handle is not None:
+            handle.close()
+        self.closed = True
+
+
+class PartitionedWriter(object):
+    """Routes records to one file per distinct combination of the partition_by fields, e.g. every gender and
+    category, in a single pass.
+
+    Every partition buffers up to buffer_size characters before writing them in one call, and at most
+    max_open_files files are open at once, the least recently written one is closed first. Each byte is written
+    once whatever the number of partitions. File names are built from the field values, characters other than
+    letters, digits, '.' and '-' are percent-encoded. value_names may map values to shorter names, e.g. category
+    labels to their codes, a ValueError is raised if two partitions would share a file."""
+
+    def __init__(self, output_dir: str, partition_by: Sequence[str] = ('BMICategory', 'Gender'),
+                 output_format: str = FORMAT_NDJSON, buffer_size: int = DEFAULT_PARTITION_BUFFER_SIZE,
+                 max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+                 value_names: Optional[Dict[str, Dict[object, str]]] = None):
+        if max_open_files < 1:
+            raise ValueError(f'At least one open file is required, got {max_open_files}')
+        self.output_dir = output_dir
+        self.partition_by = tuple(partition_by)
+        self.output_format = detect_format(output_dir, output_format)
+        self.buffer_size = buffer_size
+        self.max_open_files = max_open_files
+        self.value_names = value_names or {}
+
+        self.partitions: Dict[Tuple, RecordWriter] = {}
+        self._partition_keys: Dict[str, Tuple] = {}
+        self._handles: 'OrderedDict[str, IO]' = OrderedDict()
+        self._extension = '.' + self.output_format
+        os.makedirs(output_dir, exist_ok=True)
+
+    @property
+    def open_files(self) -> int:
+        return len(self._handles)
+
+    def partition_path(self, key: Tuple) -> str:
+        names = []
+        for field, value in zip(self.partition_by, key):
+            name = self.value_names.get(field, {}).get(value, value)
+            names.append(f'{field}-{_escape_file_name(str(name))}')
+        return os.path.join(self.output_dir, '_'.join(names) + self._extension)
+
+    def write(self, record: dict) -> None:
+        key = tuple([record.get(field) for field in self.partition_by])
+        partition = self.partitions.get(key)
+        if partition is None:
+            output_file_src = self.partition_path(key)
+            # value_names or a case insensitive file system may still map different keys to one file
+            other_key = self._partition_keys.setdefault(os.path.normcase(output_file_src), key)
+            if other_key != key:
+                raise ValueError(f'Partitions {other_key} and {key} would both be written to {output_file_src}')
+            partition = self.partitions[key] = WRITERS[self.output_format](
+                output_file_src, self.buffer_size, _PartitionFile(output_file_src, self._handles, self.max_open_files))
+        partition.write(record)
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        """Writes every record of an iterable, returns the number of records written"""
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+
+    def counts(self) -> Dict[str, int]:
+        """Returns the number of records written to every partition file"""
+        return {partition.output_file_src: partition.records_written for partition in self.partitions.values()}
+
+    def close(self) -> None:
+        for partition in self.partitions.values():
+            partition.close()
+
+    def __enter__(self) -> 'PartitionedWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
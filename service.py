@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import json
+import math
+from http import HTTPStatus
+from typing import List, Optional, Tuple
+
+from main import BMICalculator, np
+from processing.validation import describe_rejection, RecordSchema
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+
+DEFAULT_MAX_BATCH_SIZE = 512
+DEFAULT_MAX_BATCH_DELAY = 0.005
+DEFAULT_MAX_PENDING = 10000
+MAX_BODY_BYTES = 64 * 1024
+
+# requests carry no gender
+_validate_request = RecordSchema.from_calculator(BMICalculator(), required_fields=('HeightCm', 'WeightKg')).compile()
+
+
+class ServiceOverloadedError(Exception):
+    """Raise when a request arrives while the maximum number of requests is already waiting to be scored"""
+
+
+class InvalidRequestError(ValueError):
+    """Raise when a request body does not describe a single person"""
+
+
+def parse_person(body: bytes) -> Tuple[float, float]:
+    """Returns the weight and height of the json object in a request body"""
+    try:
+        person_data = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise InvalidRequestError(f'Failed to decode JSON data - {e}')
+    if not isinstance(person_data, dict):
+        raise InvalidRequestError('Expected a JSON object')
+
+    reason = _validate_request(person_data)
+    if reason is not None:
+        raise InvalidRequestError(describe_rejection(reason, person_data))
+    return person_data['WeightKg'], person_data['HeightCm']
+
+
+class MicroBatcher(object):
+    """Gathers concurrent scoring requests into batches scored with a single calculator call.
+
+    A batch is scored once it holds max_batch_size requests or max_batch_delay seconds after its first request
+    arrived, whichever comes first. Requests arriving while max_pending are already waiting are rejected with
+    ServiceOverloadedError instead of queueing up without bound."""
+
+    def __init__(self, bmi_calculator: Optional[BMICalculator] = None, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_batch_delay: float = DEFAULT_MAX_BATCH_DELAY, max_pending: int = DEFAULT_MAX_PENDING):
+        self.bmi_calculator = bmi_calculator or BMICalculator()
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.max_pending = max_pending
+
+        self.category_labels = {band.category.value: band.category_text for band in self.bmi_calculator.classifier.bands}
+        self.risk_labels = {band.risk.value: band.risk_text for band in self.bmi_calculator.classifier.bands}
+
+        self.batch_count = 0
+        self.scored_count = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(self.max_pending)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def score(self, mass_kg: float, height: float) -> dict:
+        """Waits for the batch holding this request to be scored and returns its bmi, category and risk"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((mass_kg, height, future))
+        except asyncio.QueueFull:
+            raise ServiceOverloadedError(f'{self.max_pending} requests are already waiting to be scored')
+        return await future
+
+    async def _collect_batch(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_batch_delay
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def score_batch(self, weights: List[float], heights: List[float]) -> List[dict]:
+        """Scores a whole batch with one calculate_batch call, or a plain loop when numpy is not installed"""
+        if np is not None:
+            batch = self.bmi_calculator.calculate_batch(weights, heights)
+            # rows without a finite bmi have INVALID_CODE as category and risk, left without a label
+            return [{'BMI': bmi_value, 'BMICategory': self.category_labels.get(category),
+                     'HealthRisk': self.risk_labels.get(risk)}
+                    for bmi_value, category, risk in zip(batch.bmi.tolist(), batch.category.tolist(), batch.risk.tolist())]
+
+        results = []
+        for mass_kg, height in zip(weights, heights):
+            try:
+                bmi_value = self.bmi_calculator.calculate(mass_kg, height)
+            except ZeroDivisionError:
+                bmi_value = math.inf
+            if not math.isfinite(bmi_value):
+                results.append({'BMI': math.nan, 'BMICategory': None, 'HealthRisk': None})
+                continue
+            classification = self.bmi_calculator.classify(bmi_value)
+            results.append({'BMI': bmi_value, 'BMICategory': classification.category_text,
+                            'HealthRisk': classification.risk_text})
+        return results
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            weights, heights, futures = zip(*batch)
+            try:
+                results = self.score_batch(list(weights), list(heights))
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batch_count += 1
+            self.scored_count += len(batch)
+            for future, result in zip(futures, results):
+                # the client may have gone away while its request was waiting
+                if not future.done():
+                    future.set_result(result)
+
+
+class BMIService(object):
+    """Minimal HTTP/1.1 JSON service scoring one person per request.
+
+    POST /bmi with {"HeightCm": 178, "WeightKg": 75} returns the bmi, category and risk, GET /health returns the
+    batching counters. Connections are kept alive between requests."""
+
+    def __init__(self, batcher: Optional[MicroBatcher] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.batcher = batcher or MicroBatcher()
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        await self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.batcher.stop()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_request(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, dict]:
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, {'batches': self.batcher.batch_count, 'scored': self.batcher.scored_count}
+        if path != '/bmi':
+            return HTTPStatus.NOT_FOUND, {'error': f'Unknown path {path}'}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': f'Unsupported method {method}'}
+
+        try:
+            mass_kg, height = parse_person(body)
+            result = await self.batcher.score(mass_kg, height)
+        except InvalidRequestError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        except ServiceOverloadedError as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': str(e)}
+
+        if math.isnan(result['BMI']):
+            return HTTPStatus.BAD_REQUEST, {'error': 'Incomplete data found for height'}
+        return HTTPStatus.OK, result
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header_line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                content_length = int(headers.get('content-length', 0) or 0)
+                if content_length > MAX_BODY_BYTES:
+                    status, response = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Request body is too large'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(content_length)
+                    status, response = await self._handle_request(method, path, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                payload = json.dumps(response).encode()
+                writer.write(f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                             f'Content-Type: application/json\r\n'
+                             f'Content-Length: {len(payload)}\r\n'
+                             f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local HTTP/JSON BMI scoring service with request micro-batching')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-batch-delay', type=float, default=DEFAULT_MAX_BATCH_DELAY,
+                        help='seconds to wait for more requests after the first one of a batch')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help='requests waiting to be scored before new ones are rejected with 503')
+    args = parser.parse_args()
+
+    service = BMIService(MicroBatcher(max_batch_size=args.max_batch_size, max_batch_delay=args.max_batch_delay,
+                                      max_pending=args.max_pending), args.host, args.port)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,44 @@
+import os
+import pickle
+from unittest import TestCase
+from constants.bmi_units import BMIUnits, bmi_level_to_text, HealthRisk
+from main import DataProcessor
+from processing.aggregation import Aggregation
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+
+
+class TestAggregation(TestCase):
+
+    def test_aggregate_matches_process_data(self):
+        data_file_src = os.path.join(TEST_DATA_DIR, 'data.json')
+        processed_data = DataProcessor.process_data(data_file_src)
+        aggregation = DataProcessor.aggregate(data_file_src, group_by=('BMICategory', 'Gender'))
+
+        for category in BMIUnits:
+            for gender in ['Male', 'Female']:
+                matching_data = [data for data in processed_data
+                                 if data['Gender'] == gender and data['BMICategory'] == bmi_level_to_text(category)]
+                group_totals = aggregation.totals(BMICategory=category, Gender=gender)
+                self.assertEqual(group_totals.count, len(matching_data))
+                self.assertAlmostEqual(group_totals.bmi_sum, sum(data['BMI'] for data in matching_data))
+                self.assertEqual(group_totals.weight_sum, sum(data['WeightKg'] for data in matching_data))
+
+        self.assertEqual(aggregation.count(), len(processed_data))
+        self.assertEqual(aggregation.count(BMICategory=BMIUnits.OVER_WEIGHT), 1)
+
+    def test_merge(self):
+        data_file_src = os.path.join(TEST_DATA_DIR, 'data2.json')
+        aggregation = DataProcessor.aggregate(data_file_src, group_by=('HealthRisk',))
+        aggregation.merge(pickle.loads(pickle.dumps(aggregation)))
+        self.assertEqual(aggregation.count(HealthRisk=HealthRisk.LOW), 8)
+        self.assertEqual(aggregation.count(), 12)
+
+        with self.assertRaises(ValueError):
+            aggregation.merge(Aggregation(('Gender',)))
+
+    def test_invalid_fields(self):
+        with self.assertRaises(ValueError):
+            Aggregation(('WeightKg',))
+        with self.assertRaises(ValueError):
+            Aggregation(('Gender',)).count(HealthRisk=HealthRisk.LOW)
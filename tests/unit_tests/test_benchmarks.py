@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+from benchmarks.generate_data import iter_people, write_data_file
+from benchmarks.run_benchmarks import _passes, compare_to_baseline
+from main import DataProcessor
+
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), '..', '..')
+
+
+class TestGenerateData(TestCase):
+
+    def test_seeded(self):
+        self.assertListEqual(list(iter_people(100, seed=3)), list(iter_people(100, seed=3)))
+        self.assertNotEqual(list(iter_people(100, seed=3)), list(iter_people(100, seed=4)))
+
+    def test_defects(self):
+        people = list(iter_people(2000, seed=0, incomplete_rate=0.1, invalid_rate=0.1))
+        incomplete = [person_data for person_data in people if len(person_data) < 3]
+        invalid = [person_data for person_data in people if len(person_data) == 3 and
+                   (type(person_data['HeightCm']) != int or type(person_data['WeightKg']) != int or
+                    person_data['HeightCm'] == 0)]
+        self.assertAlmostEqual(len(incomplete) / len(people), 0.1, delta=0.03)
+        self.assertAlmostEqual(len(invalid) / len(people), 0.1, delta=0.03)
+
+    def test_write_data_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            records = {}
+            for data_format in ['json', 'ndjson', 'csv']:
+                data_file_src = os.path.join(temp_dir, f'data.{data_format}')
+                # string values can not be told apart from numbers in csv so only missing values are generated
+                write_data_file(data_file_src, 500, seed=1, data_format=data_format, invalid_rate=0, corrupted_rate=0)
+                records[data_format] = DataProcessor.process_data(data_file_src)
+
+            with open(os.path.join(temp_dir, 'data.json')) as file:
+                self.assertEqual(len(json.load(file)), 500)
+            self.assertGreater(len(records['json']), 450)
+            self.assertListEqual(records['ndjson'], records['json'])
+            self.assertListEqual(records['csv'], records['json'])
+
+
+class TestPasses(TestCase):
+
+    def test_covers_size(self):
+        self.assertListEqual([item for sample in _passes([1, 2, 3], 7) for item in sample], [1, 2, 3, 1, 2, 3, 1])
+        self.assertListEqual(list(_passes([1, 2, 3], 0)), [])
+
+
+class TestCompareToBaseline(TestCase):
+
+    def test_regressions(self):
+        baseline = {'benchmarks': {'calculate[1000]': {'records_per_second': 1000},
+                                   'process_data[1000]': {'records_per_second': 1000, 'peak_memory_bytes': 1000}}}
+        results = {'benchmarks': {'calculate[1000]': {'records_per_second': 850},
+                                  'process_data[1000]': {'records_per_second': 1200, 'peak_memory_bytes': 1300},
+                                  'category[1000]': {'records_per_second': 1}}}
+        regressions = compare_to_baseline(results, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('process_data[1000]: peak memory', regressions[0])
+        self.assertEqual(len(compare_to_baseline(results, baseline, tolerance=0.1)), 2)
+
+    def test_missing_baseline_fails(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            command = [sys.executable, '-m', 'benchmarks.run_benchmarks', '--sizes', '10', '--repeat', '1',
+                       '--work-dir', temp_dir, '--output', os.path.join(temp_dir, 'output.json'),
+                       '--baseline', os.path.join(temp_dir, 'baseline.json')]
+            self.assertNotEqual(subprocess.run(command, cwd=PROJECT_DIR, capture_output=True).returncode, 0)
+            self.assertEqual(subprocess.run(command + ['--save-baseline'], cwd=PROJECT_DIR,
+                                            capture_output=True).returncode, 0)
+            self.assertEqual(subprocess.run(command + ['--tolerance', '100'], cwd=PROJECT_DIR,
+                                            capture_output=True).returncode, 0)
@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+import tempfile
+from unittest import TestCase
+from main import DataProcessor
+from processing.checkpoint import checkpoint_path, load_checkpoint
+
+RECORDS = [{'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96},
+           {'Gender': 'Fémale', 'HeightCm': 161, 'WeightKg': 85},
+           {'Gender': 'Male', 'HeightCm': 180},
+           {'Gender': 'Female', 'HeightCm': 166, 'WeightKg': 62},
+           {'Gender': 'Female', 'HeightCm': 150, 'WeightKg': 70}]
+
+
+class TestIncrementalAggregation(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file_src = os.path.join(self.temp_dir.name, 'data.json')
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, records: list, newline: str = None) -> None:
+        with open(self.data_file_src, 'w', encoding='utf-8', newline=newline) as file:
+            json.dump(records, file, indent=4, ensure_ascii=False)
+
+    def _aggregate_incremental(self):
+        return DataProcessor.aggregate_incremental(self.data_file_src, group_by=('BMICategory', 'Gender'))
+
+    def test_resumes_on_appended_records(self):
+        self._write(RECORDS[:2])
+        self._aggregate_incremental()
+        self.assertEqual(load_checkpoint(checkpoint_path(self.data_file_src)).record_index, 2)
+
+        self._write(RECORDS)
+        aggregation = self._aggregate_incremental()
+        checkpoint = load_checkpoint(checkpoint_path(self.data_file_src))
+        self.assertEqual(checkpoint.record_index, len(RECORDS))
+        self.assertEqual(aggregation, DataProcessor.aggregate(self.data_file_src, group_by=('BMICategory', 'Gender')))
+        self.assertEqual(checkpoint.aggregation, aggregation)
+
+        # nothing new, totals are taken from the checkpoint
+        self.assertEqual(self._aggregate_incremental(), aggregation)
+        self.assertEqual(load_checkpoint(checkpoint_path(self.data_file_src)).record_index, len(RECORDS))
+
+    def test_resumes_on_crlf_file(self):
+        self._write(RECORDS[:2], newline='\r\n')
+        self._aggregate_incremental()
+        with open(self.data_file_src, 'rb') as file:
+            data = file.read()
+        self.assertEqual(load_checkpoint(checkpoint_path(self.data_file_src)).offset, data.rindex(b'}') + 1)
+
+        self._write(RECORDS, newline='\r\n')
+        aggregation = self._aggregate_incremental()
+        self.assertEqual(load_checkpoint(checkpoint_path(self.data_file_src)).record_index, len(RECORDS))
+        self.assertEqual(aggregation, DataProcessor.aggregate(self.data_file_src, group_by=('BMICategory', 'Gender')))
+
+    def test_recomputes_changed_file(self):
+        self._write(RECORDS)
+        self._aggregate_incremental()
+
+        changed_records = [dict(RECORDS[0], WeightKg=50)] + RECORDS[1:] + RECORDS[:1]
+        self._write(changed_records)
+        aggregation = self._aggregate_incremental()
+        self.assertEqual(load_checkpoint(checkpoint_path(self.data_file_src)).record_index, len(changed_records))
+        self.assertEqual(aggregation, DataProcessor.aggregate(self.data_file_src, group_by=('BMICategory', 'Gender')))
+
+        self._write(RECORDS[:1])
+        # reported like any other decoding error instead of raising
+        self.assertEqual(self._aggregate_incremental(), DataProcessor.aggregate(self.data_file_src,
+                                                                               group_by=('BMICategory', 'Gender')))
+
+    def test_recomputes_edit_in_the_middle(self):
+        records = [dict(RECORDS[0], WeightKg=60 + index % 40) for index in range(5000)]
+        self._write(records)
+        self._aggregate_incremental()
+
+        # same length, a single changed value far from the start and end of the processed records
+        records[2500] = dict(records[2500], WeightKg=99 if records[2500]['WeightKg'] != 99 else 98)
+        self._write(records + RECORDS[:1])
+        self.assertEqual(self._aggregate_incremental(),
+                         DataProcessor.aggregate(self.data_file_src, group_by=('BMICategory', 'Gender')))
+
+    def test_resumes_line_formats(self):
+        contents = {'data.ndjson': [json.dumps(record, ensure_ascii=False) + '\n' for record in RECORDS],
+                    'data.csv': ['Gender,HeightCm,WeightKg\n'] + [
+                        f"{record['Gender']},{record['HeightCm']},{record.get('WeightKg', '')}\n" for record in RECORDS]}
+        for file_name, lines in contents.items():
+            data_file_src = os.path.join(self.temp_dir.name, file_name)
+            with open(data_file_src, 'w', encoding='utf-8') as file:
+                # the last line is not complete yet
+                file.write(''.join(lines[:-2]) + lines[-2][:5])
+            DataProcessor.aggregate_incremental(data_file_src, group_by=('BMICategory', 'Gender'))
+
+            with open(data_file_src, 'w', encoding='utf-8') as file:
+                file.write(''.join(lines))
+            aggregation = DataProcessor.aggregate_incremental(data_file_src, group_by=('BMICategory', 'Gender'))
+            self.assertEqual(aggregation, DataProcessor.aggregate(data_file_src, group_by=('BMICategory', 'Gender')))
+            self.assertEqual(aggregation.count(), 4, msg=file_name)
+            self.assertEqual(load_checkpoint(checkpoint_path(data_file_src)).record_index, len(RECORDS))
+
+    def test_compressed_and_undecodable_files(self):
+        data_file_src = os.path.join(self.temp_dir.name, 'data.json.gz')
+        with open(data_file_src, 'wb') as file:
+            file.write(gzip.compress(json.dumps(RECORDS).encode()))
+        self.assertEqual(DataProcessor.aggregate_incremental(data_file_src).count(), 4)
+        self.assertFalse(os.path.exists(checkpoint_path(data_file_src)))
+
+        with open(self.data_file_src, 'wb') as file:
+            file.write(json.dumps(RECORDS[:1]).encode()[:-1] + b', {"Gender": "F\xe9male"}]')
+        # reported like any other decoding error instead of raising
+        self.assertEqual(self._aggregate_incremental(), DataProcessor.aggregate(self.data_file_src,
+                                                                               group_by=('BMICategory', 'Gender')))
+
+    def test_unreadable_checkpoint(self):
+        self._write(RECORDS)
+        with open(checkpoint_path(self.data_file_src), 'w') as file:
+            file.write('{')
+        self.assertEqual(self._aggregate_incremental().count(), 4)
@@ -0,0 +1,108 @@
+import bz2
+import contextlib
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import skipIf, TestCase
+from main import DataProcessor
+from processing.compression import BackgroundDecompressor, CODEC_BZ2, CODEC_GZIP, CompressionError, detect_codec
+from processing.compression import zstandard
+from processing.metrics import ProcessingStats
+from processing.readers import detect_format, FORMAT_CSV
+
+RECORDS = [{'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96},
+           {'Gender': 'Male', 'WeightKg': 85},
+           {'Gender': 'Female', 'HeightCm': 166, 'WeightKg': 62},
+           {'Gender': 'Female', 'HeightCm': 150, 'WeightKg': 70}]
+
+
+class TestCompressedInput(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.contents = {'json': json.dumps(RECORDS, indent=4),
+                         'ndjson': ''.join(json.dumps(record) + '\n' for record in RECORDS),
+                         'csv': 'Gender,HeightCm,WeightKg\nMale,171,96\nMale,,85\nFemale,166,62\nFemale,150,70\n'}
+        self.expected_list = DataProcessor.process_data(self._write('plain.json', self.contents['json'].encode()))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, file_name: str, data: bytes) -> str:
+        data_file_src = os.path.join(self.temp_dir.name, file_name)
+        with open(data_file_src, 'wb') as file:
+            file.write(data)
+        return data_file_src
+
+    def test_gzip_and_bz2(self):
+        for extension, compress in [('.gz', gzip.compress), ('.bz2', bz2.compress)]:
+            for data_format, content in self.contents.items():
+                data_file_src = self._write(f'data.{data_format}{extension}', compress(content.encode()))
+                self.assertListEqual(DataProcessor.process_data(data_file_src), self.expected_list,
+                                     msg=f'{data_format}{extension}')
+
+    @skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        data_file_src = self._write('data.json.zst', zstandard.ZstdCompressor().compress(self.contents['json'].encode()))
+        self.assertListEqual(DataProcessor.process_data(data_file_src), self.expected_list)
+
+    def test_detection(self):
+        data_file_src = self._write('data.csv.gz', gzip.compress(self.contents['csv'].encode()))
+        self.assertEqual(detect_codec(data_file_src), CODEC_GZIP)
+        self.assertEqual(detect_format(data_file_src), FORMAT_CSV)
+
+        # a compressed file without a compression extension is recognised by its first bytes
+        data_file_src = self._write('data.json', bz2.compress(self.contents['json'].encode()))
+        self.assertEqual(detect_codec(data_file_src), CODEC_BZ2)
+        self.assertListEqual(DataProcessor.process_data(data_file_src), self.expected_list)
+        self.assertIsNone(detect_codec(os.path.join(self.temp_dir.name, 'plain.json')))
+
+    def test_truncated_file(self):
+        data = gzip.compress(self.contents['ndjson'].encode())
+        data_file_src = self._write('data.ndjson.gz', data[:len(data) - 10])
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            DataProcessor.process_data(data_file_src)
+        self.assertIn(f'Failed to decompress {data_file_src}', stdout.getvalue())
+
+    def test_background_decompressor(self):
+        content = ''.join(json.dumps(record) + '\n' for record in RECORDS * 1000).encode()
+        data_file_src = self._write('data.ndjson.gz', gzip.compress(content))
+        with BackgroundDecompressor(data_file_src, CODEC_GZIP, chunk_size=1000, max_chunks=2) as decompressor:
+            self.assertEqual(decompressor.read(), content)
+
+        # closing before the end stops the thread waiting on the full queue
+        decompressor = BackgroundDecompressor(data_file_src, CODEC_GZIP, chunk_size=100, max_chunks=1)
+        self.assertEqual(decompressor.read(50), content[:50])
+        decompressor.close()
+        self.assertFalse(decompressor._thread.is_alive())
+
+        with BackgroundDecompressor(self._write('bad.gz', b'\x1f\x8bnot gzip'), CODEC_GZIP) as decompressor:
+            self.assertRaises(CompressionError, decompressor.read)
+
+    def test_process_many_directory(self):
+        data_dir = os.path.join(self.temp_dir.name, 'inputs')
+        os.mkdir(data_dir)
+        shutil.copy(os.path.join(self.temp_dir.name, 'plain.json'), os.path.join(data_dir, 'a.json'))
+        with open(os.path.join(data_dir, 'b.ndjson.gz'), 'wb') as file:
+            file.write(gzip.compress(self.contents['ndjson'].encode()))
+
+        data_list = DataProcessor.process_many(data_dir, workers=1, shard_bytes=10)
+        self.assertListEqual(data_list, self.expected_list * 2)
+
+    def test_streamed_by_caller(self):
+        data_file_src = self._write('data.ndjson.gz', gzip.compress(self.contents['ndjson'].encode()))
+        # the worker leaves the file to the caller instead of returning all of its records at once
+        task = next(DataProcessor._shard_tasks(data_file_src, shard_bytes=10))
+        self.assertIsNone(DataProcessor._process_shard(task)[1])
+
+        expected_stats = ProcessingStats()
+        DataProcessor.process_data(data_file_src, stats=expected_stats)
+        for workers in [1, 2]:
+            stats = ProcessingStats()
+            self.assertListEqual(DataProcessor.process_many(data_file_src, workers=workers, stats=stats),
+                                 self.expected_list)
+            self.assertDictEqual(stats.as_dict(), expected_stats.as_dict())
@@ -0,0 +1,134 @@
+import json
+import os
+import random
+import tempfile
+from unittest import TestCase
+from main import DataProcessor
+from constants.bmi_units import BMIUnits
+from processing.distribution import Distribution, Histogram, QuantileSketch, TopK
+
+
+class TestQuantileSketch(TestCase):
+
+    def test_relative_error(self):
+        generator = random.Random(0)
+        values = sorted(generator.uniform(15, 45) for _ in range(10000))
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in [0, 0.01, 0.25, 0.5, 0.9, 0.99, 1]:
+            expected = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), expected, delta=expected * 0.01, msg=f'q:{q}')
+        self.assertEqual(sketch.quantile(0), values[0])
+        self.assertEqual(sketch.quantile(1), values[-1])
+
+    def test_merge(self):
+        generator = random.Random(1)
+        values = [generator.uniform(15, 45) for _ in range(1000)] + [0] * 10
+        sketch, first_half, second_half = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for index, value in enumerate(values):
+            sketch.add(value)
+            (first_half if index % 2 else second_half).add(value)
+        first_half.merge(second_half)
+
+        self.assertEqual(first_half.count, sketch.count)
+        self.assertListEqual(first_half.quantiles([0, 0.5, 0.99]), sketch.quantiles([0, 0.5, 0.99]))
+        self.assertEqual(sketch.quantile(0), 0)
+        self.assertRaises(ValueError, first_half.merge, QuantileSketch(0.05))
+
+    def test_empty(self):
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+        self.assertRaises(ValueError, QuantileSketch().quantile, 1.5)
+
+
+class TestHistogram(TestCase):
+
+    def test_bins(self):
+        histogram = Histogram(10, 20, 5)
+        for value in [5, 10, 11.9, 12, 19.99, 20, 35]:
+            histogram.add(value)
+        self.assertListEqual(histogram.counts, [2, 1, 0, 0, 1])
+        self.assertEqual((histogram.underflow, histogram.overflow), (1, 2))
+        self.assertListEqual(histogram.edges, [10, 12, 14, 16, 18, 20])
+
+        other = Histogram(10, 20, 5)
+        other.add(15)
+        histogram.merge(other)
+        self.assertListEqual(histogram.counts, [2, 1, 1, 0, 1])
+        self.assertRaises(ValueError, histogram.merge, Histogram(10, 20, 4))
+
+
+class TestTopK(TestCase):
+
+    def test_largest_and_smallest(self):
+        largest, smallest = TopK(2), TopK(2, smallest=True)
+        for index, bmi in enumerate([25, 40, 18, 40, 30]):
+            largest.add(bmi, {'index': index})
+            smallest.add(bmi, {'index': index})
+        # ties keep the record seen first
+        self.assertListEqual(largest.items(), [(40, {'index': 1}), (40, {'index': 3})])
+        self.assertListEqual(smallest.items(), [(18, {'index': 2}), (25, {'index': 0})])
+
+    def test_merge(self):
+        first, second = TopK(2), TopK(2)
+        first.add(30, {'index': 0})
+        second.add(30, {'index': 1})
+        second.add(35, {'index': 2})
+        first.merge(second)
+        self.assertListEqual(first.items(), [(35, {'index': 2}), (30, {'index': 0})])
+
+
+class TestDistribution(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        generator = random.Random(2)
+        self.records = [{'Gender': generator.choice(['Male', 'Female']), 'HeightCm': generator.randint(150, 200),
+                         'WeightKg': generator.randint(45, 140)} for _ in range(500)]
+        self.data_file_srcs = []
+        for index, records in enumerate([self.records[:250], self.records[250:]]):
+            data_file_src = os.path.join(self.temp_dir.name, f'data{index}.json')
+            with open(data_file_src, 'w') as file:
+                json.dump(records, file)
+            self.data_file_srcs.append(data_file_src)
+        self.data_file_src = os.path.join(self.temp_dir.name, 'data.json')
+        with open(self.data_file_src, 'w') as file:
+            json.dump(self.records, file)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_describe(self):
+        distribution = DataProcessor.describe(self.data_file_src, top_k=3)
+        processed_data = DataProcessor.process_data(self.data_file_src)
+
+        female_obese = [record['BMI'] for record in processed_data
+                        if record['Gender'] == 'Female' and record['BMICategory'] == 'Moderately obese']
+        group_distribution = distribution.distribution(Gender='Female', BMICategory=BMIUnits.MODERATELY_OBESE)
+        self.assertEqual(group_distribution.count, len(female_obese))
+        self.assertListEqual([bmi for bmi, _ in group_distribution.largest.items()],
+                             sorted(female_obese, reverse=True)[:3])
+        self.assertEqual(sum(group_distribution.histogram.counts), len(female_obese))
+
+        overall = distribution.distribution()
+        self.assertEqual(overall.count, len(processed_data))
+        bmi_values = sorted(record['BMI'] for record in processed_data)
+        self.assertAlmostEqual(overall.sketch.quantile(0.5), bmi_values[(len(bmi_values) - 1) // 2],
+                               delta=bmi_values[len(bmi_values) // 2] * 0.01)
+        self.assertEqual(overall.smallest.items()[0][0], bmi_values[0])
+
+    def test_merge_shards(self):
+        distribution = DataProcessor.describe(self.data_file_src)
+        merged_distribution = Distribution()
+        for data_file_src in self.data_file_srcs:
+            merged_distribution.merge(DataProcessor.describe(data_file_src))
+
+        self.assertEqual(merged_distribution.groups.keys(), distribution.groups.keys())
+        for key, group_distribution in distribution.groups.items():
+            merged_group = merged_distribution.groups[key]
+            self.assertEqual(merged_group.sketch.buckets, group_distribution.sketch.buckets)
+            self.assertListEqual(merged_group.histogram.counts, group_distribution.histogram.counts)
+            self.assertListEqual(merged_group.largest.items(), group_distribution.largest.items())
+
+        self.assertRaises(ValueError, merged_distribution.merge, Distribution(('Gender',)))
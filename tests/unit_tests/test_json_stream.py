@@ -0,0 +1,49 @@
+import io
+import json
+from unittest import TestCase
+from processing.json_stream import iter_json_array, JSONArrayError, JSONArrayReader
+
+
+class TestIterJSONArray(TestCase):
+
+    def test_matches_json_loads_for_any_chunk_size(self):
+        data = [{'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96}, 12345, -1.5e3, 'text, with ] chars', [], {}, None]
+        raw_data = json.dumps(data, indent=4)
+        for chunk_size in [1, 2, 3, 7, 64, 4096]:
+            parsed_data = list(iter_json_array(io.StringIO(raw_data), chunk_size=chunk_size))
+            self.assertListEqual(parsed_data, data, msg=f'mismatch with chunk_size {chunk_size}')
+
+    def test_empty_array(self):
+        self.assertListEqual(list(iter_json_array(io.StringIO(' [ ] '), chunk_size=1)), [])
+
+    def test_corrupted_array(self):
+        for raw_data in ['[{"a": 1} {"b": 2}]', '[{"a": 1}, {"b": ', '[1, 2', '']:
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_array(io.StringIO(raw_data), chunk_size=4))
+
+    def test_error_position(self):
+        for raw_data in ['[{"a": 1},\n {"b": 2} {"c": 3}]', '[\n  1,\n  {"b": tru}\n]']:
+            with self.assertRaises(json.JSONDecodeError) as expected:
+                json.loads(raw_data)
+            for chunk_size in [1, 4, 4096]:
+                with self.assertRaises(json.JSONDecodeError) as error:
+                    list(iter_json_array(io.StringIO(raw_data), chunk_size=chunk_size))
+                self.assertEqual(str(error.exception), str(expected.exception))
+
+    def test_not_an_array(self):
+        with self.assertRaises(JSONArrayError):
+            list(iter_json_array(io.StringIO('{"Gender": "Male"}')))
+
+    def test_offset_and_resume(self):
+        raw_data = json.dumps([{'Gender': 'Fémale'}, 'ü' * 10, 3], indent=2, ensure_ascii=False)
+        raw_bytes = raw_data.encode('utf-8')
+        for chunk_size in [1, 5, 4096]:
+            reader = JSONArrayReader(io.StringIO(raw_data), chunk_size=chunk_size)
+            iterator = iter(reader)
+            self.assertDictEqual(next(iterator), {'Gender': 'Fémale'})
+            offset = reader.offset
+            self.assertTrue(raw_bytes[:offset].decode('utf-8').endswith('}'))
+
+            resumed_reader = JSONArrayReader(io.StringIO(raw_bytes[offset:].decode('utf-8')), chunk_size, resume=True)
+            self.assertListEqual(list(resumed_reader), ['ü' * 10, 3])
+            self.assertEqual(offset + resumed_reader.offset, raw_bytes.rindex(b'3') + 1)
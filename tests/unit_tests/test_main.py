@@ -1,10 +1,12 @@
 import json
 import os
 import sys
+import tempfile
 from bmi import Bmi
-from main import BMICalculator, DataProcessor
+from main import BMICalculator, DataProcessor, INVALID_CODE, np
 from constants.bmi_units import BMIUnits, bmi_level_to_text, HealthRisk, health_risk_to_text
-from unittest import TestCase
+from processing.metrics import ProcessingStats, SKIP_ZERO_HEIGHT
+from unittest import TestCase, skipIf
 
 
 class TestBMICalculator(TestCase):
@@ -192,6 +194,45 @@ class TestBMICalculator(TestCase):
         self.assertEqual(matches, len(category_edge_cases))
 
 
+@skipIf(np is None, 'numpy is not installed')
+class TestBMICalculatorBatch(TestCase):
+
+    def setUp(self) -> None:
+        self.bmi_calculator = BMICalculator()
+
+    def test_calculate_batch_matches_scalar(self):
+        heights = [height for height in range(-5, 260) for _ in range(-5, 640, 7)]
+        weights = [weight for _ in range(-5, 260) for weight in range(-5, 640, 7)]
+        heights += [sys.float_info.max*2, 175]
+        weights += [75, sys.float_info.max*2]
+
+        for decimal_places in [1, 2]:
+            batch = self.bmi_calculator.calculate_batch(weights, heights, decimal_places=decimal_places)
+            for i, (weight, height) in enumerate(zip(weights, heights)):
+                try:
+                    bmi_value = self.bmi_calculator.calculate(weight, height, decimal_places=decimal_places)
+                except ZeroDivisionError:
+                    self.assertTrue(np.isnan(batch.bmi[i]))
+                    self.assertEqual(batch.category[i], INVALID_CODE)
+                    self.assertEqual(batch.risk[i], INVALID_CODE)
+                    continue
+                self.assertEqual(batch.bmi[i], bmi_value, msg=f'mass:{weight} height:{height}')
+                self.assertEqual(bmi_level_to_text(BMIUnits(batch.category[i])), self.bmi_calculator.category(bmi_value))
+                self.assertEqual(health_risk_to_text(HealthRisk(batch.risk[i])), self.bmi_calculator.health_risk(bmi_value))
+
+    def test_calculate_batch_tiny_height(self):
+        # the square of the first height underflows to 0, the bmi of the second overflows to inf
+        batch = self.bmi_calculator.calculate_batch([70, 70, 70], [1e-200, 1e-157, 171])
+        self.assertTrue(np.isnan(batch.bmi[:2]).all())
+        self.assertListEqual(batch.category.tolist()[:2], [INVALID_CODE, INVALID_CODE])
+        self.assertEqual(batch.bmi[2], 23.94)
+
+    def test_calculate_batch_in_metres(self):
+        batch = self.bmi_calculator.calculate_batch(np.array([75, 125]), np.array([1.78, 1.96]), in_cm=False)
+        self.assertListEqual(batch.bmi.tolist(), [23.67, 32.54])
+        self.assertListEqual(batch.category.tolist(), [BMIUnits.NORMAL_WEIGHT.value, BMIUnits.MODERATELY_OBESE.value])
+
+
 class TestDataProcessor(TestCase):
     # test various types of json files to ensure program does not crash
 
@@ -236,4 +277,36 @@ class TestDataProcessor(TestCase):
 
         data_file_src = os.path.join(os.path.dirname(__file__), '..', 'test_data', 'data2.json')
         data_list = DataProcessor.process_data(data_file_src)
-        self.assertListEqual(data_list, expected_list)
\ No newline at end of file
+        self.assertListEqual(data_list, expected_list)
+
+    def test_tiny_height(self):
+        stats = ProcessingStats()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_file_src = os.path.join(temp_dir, 'tiny.json')
+            with open(data_file_src, 'w') as file:
+                json.dump([{'Gender': 'Male', 'HeightCm': 1e-200, 'WeightKg': 70},
+                           {'Gender': 'Male', 'HeightCm': 5e-324, 'WeightKg': 70},
+                           {'Gender': 'Male', 'HeightCm': 1e-157, 'WeightKg': 70}], file)
+            self.assertListEqual(DataProcessor.process_data(data_file_src, stats=stats), [])
+        self.assertEqual(stats.skipped[SKIP_ZERO_HEIGHT], 3)
+
+    def test_iter_records(self):
+        data_file_src = os.path.join(os.path.dirname(__file__), '..', 'test_data', 'data2.json')
+        records = DataProcessor.iter_records(data_file_src)
+        self.assertNotIsInstance(records, list)
+        self.assertListEqual(list(records), DataProcessor.process_data(data_file_src))
+
+    def test_iter_records_corrupted_json(self):
+        data_file_src = os.path.join(os.path.dirname(__file__), '..', 'test_data', 'corrupted.json')
+        self.assertListEqual(list(DataProcessor.iter_records(data_file_src)), [])
+
+    def test_process_many_matches_sequential(self):
+        data_dir = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+        expected_list = []
+        for file_name in sorted(os.listdir(data_dir)):
+            expected_list += DataProcessor.process_data(os.path.join(data_dir, file_name))
+
+        for workers in [1, 2]:
+            for shard_bytes in [1, 100, 10 ** 9]:
+                data_list = DataProcessor.process_many(data_dir, workers=workers, shard_bytes=shard_bytes)
+                self.assertListEqual(data_list, expected_list, msg=f'workers:{workers} shard_bytes:{shard_bytes}')
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+from unittest import mock, TestCase
+from main import BMICalculator, DataProcessor
+from processing.metrics import ProcessingStats, SampledLogger, SKIP_HEIGHT_TYPE, SKIP_MISSING_KEY, STAGES
+from processing.metrics import SKIP_NOT_A_RECORD, SKIP_NOT_FINITE, SKIP_OUT_OF_BOUNDS, SKIP_WEIGHT_TYPE
+from processing.metrics import SKIP_GENDER_TYPE, SKIP_MALFORMED, SKIP_ZERO_HEIGHT
+
+RECORDS = [{'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96},
+           {'Gender': 'Male', 'WeightKg': 85},
+           {'Gender': 'Male', 'HeightCm': '180', 'WeightKg': 77},
+           {'Gender': 'Female', 'HeightCm': 166, 'WeightKg': True},
+           {'Gender': 'Female', 'HeightCm': 0, 'WeightKg': 70},
+           {'Gender': 'Female', 'HeightCm': -167, 'WeightKg': 82},
+           42,
+           {'Gender': 'Female', 'HeightCm': 166, 'WeightKg': 62.5}]
+
+
+class TestProcessingStats(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file_src = os.path.join(self.temp_dir.name, 'data.json')
+        with open(self.data_file_src, 'w') as file:
+            json.dump(RECORDS, file)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_counters_and_hook(self):
+        skipped_records = []
+        stats = ProcessingStats(on_skip=lambda reason, index, person_data: skipped_records.append((reason, index)))
+        processed_data = DataProcessor.process_data(self.data_file_src, stats=stats)
+
+        self.assertEqual(len(processed_data), 3)
+        self.assertEqual(stats.records_read, len(RECORDS))
+        self.assertEqual(stats.accepted, 3)
+        self.assertEqual(stats.out_of_bounds, 1)
+        self.assertDictEqual(stats.skipped, {SKIP_MISSING_KEY: 1, SKIP_HEIGHT_TYPE: 1, SKIP_WEIGHT_TYPE: 1,
+                                             SKIP_ZERO_HEIGHT: 1, SKIP_OUT_OF_BOUNDS: 0, SKIP_NOT_A_RECORD: 1,
+                                             SKIP_NOT_FINITE: 0, SKIP_MALFORMED: 0,
+                                             SKIP_GENDER_TYPE: 0})
+        self.assertListEqual(skipped_records, [(SKIP_MISSING_KEY, 1), (SKIP_HEIGHT_TYPE, 2), (SKIP_WEIGHT_TYPE, 3),
+                                               (SKIP_ZERO_HEIGHT, 4), (SKIP_NOT_A_RECORD, 6)])
+
+    def test_stage_timing(self):
+        stats = ProcessingStats(timed=True)
+        DataProcessor.aggregate(self.data_file_src, stats=stats)
+        self.assertListEqual(sorted(stats.stage_seconds), sorted(STAGES))
+        self.assertTrue(all(seconds >= 0 for seconds in stats.stage_seconds.values()))
+        self.assertGreater(stats.stage_seconds['compute'], 0)
+        self.assertGreater(stats.stage_seconds['classify'], 0)
+
+    def test_stage_timing_without_cache(self):
+        stats = ProcessingStats(timed=True)
+        DataProcessor.aggregate(self.data_file_src, bmi_calculator=BMICalculator(cache_size=0), stats=stats)
+        self.assertGreater(stats.stage_seconds['compute'], 0)
+        self.assertGreater(stats.stage_seconds['classify'], 0)
+
+    def test_process_many_merges_stats(self):
+        expected_stats = ProcessingStats()
+        DataProcessor.process_data(self.data_file_src, stats=expected_stats)
+
+        stats = ProcessingStats()
+        DataProcessor.process_many(self.data_file_src, workers=1, shard_bytes=1, stats=stats)
+        self.assertDictEqual(stats.as_dict(), expected_stats.as_dict())
+
+    def test_single_shard_without_pool(self):
+        expected_records = []
+        DataProcessor.process_data(self.data_file_src, stats=ProcessingStats(
+            on_skip=lambda reason, index, person_data: expected_records.append((reason, index))))
+
+        skipped_records = []
+        stats = ProcessingStats(on_skip=lambda reason, index, person_data: skipped_records.append((reason, index)))
+        with mock.patch('main.Pool') as pool:
+            DataProcessor.process_many(self.data_file_src, stats=stats)
+        pool.assert_not_called()
+        # read in this process, the hook sees the index of every record within the file
+        self.assertListEqual(skipped_records, expected_records)
+        self.assertEqual(stats.records_read, len(RECORDS))
+
+    def test_sampled_logging(self):
+        sampled_logger = SampledLogger(log_first=2, log_every=3)
+        stats = ProcessingStats(sampled_logger=sampled_logger)
+        with self.assertLogs('bmi', level='WARNING') as logs:
+            for _ in range(11):
+                stats.skip(SKIP_MISSING_KEY, {}, 'Incomplete data found')
+        # occurrences 1, 2, 5, 8 and 11
+        self.assertEqual(len(logs.records), 5)
+        self.assertEqual(stats.skipped[SKIP_MISSING_KEY], 11)
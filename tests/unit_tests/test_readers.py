@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from main import DataProcessor
+from processing.metrics import ProcessingStats, SKIP_MALFORMED
+from processing.readers import detect_format, FormatError, iter_csv_records, iter_ndjson_records, split_lines
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+
+
+class TestReaders(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(TEST_DATA_DIR, 'incomplete.json')) as file:
+            self.records = json.load(file)
+
+        self.ndjson_file_src = os.path.join(self.temp_dir.name, 'data.ndjson')
+        with open(self.ndjson_file_src, 'w') as file:
+            file.write('\n'.join(json.dumps(record) for record in self.records) + '\n\n')
+
+        self.csv_file_src = os.path.join(self.temp_dir.name, 'data.csv')
+        with open(self.csv_file_src, 'w') as file:
+            file.write('Gender,HeightCm,WeightKg\r\n')
+            for record in self.records:
+                file.write(f"{record.get('Gender', '')},{record.get('HeightCm', '')},{record.get('WeightKg', '')}\r\n")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format('data.JSONL'), 'ndjson')
+        self.assertEqual(detect_format('data.csv'), 'csv')
+        self.assertEqual(detect_format('data.txt'), 'json')
+        self.assertEqual(detect_format('data.txt', 'csv'), 'csv')
+        with self.assertRaises(FormatError):
+            detect_format('data.json', 'xml')
+
+    def test_records_match_json(self):
+        self.assertListEqual(list(iter_ndjson_records(self.ndjson_file_src)), self.records)
+        self.assertListEqual(list(iter_csv_records(self.csv_file_src)), self.records)
+
+        expected_list = DataProcessor.process_data(os.path.join(TEST_DATA_DIR, 'incomplete.json'))
+        self.assertListEqual(DataProcessor.process_data(self.ndjson_file_src), expected_list)
+        self.assertListEqual(DataProcessor.process_data(self.csv_file_src), expected_list)
+
+    def test_explicit_format(self):
+        data_file_src = os.path.join(self.temp_dir.name, 'data.txt')
+        os.rename(self.csv_file_src, data_file_src)
+        self.assertEqual(len(DataProcessor.process_data(data_file_src, data_format='csv')), 3)
+
+    def test_malformed_ndjson_line_is_skipped(self):
+        with open(self.ndjson_file_src, 'a') as file:
+            file.write('{"Gender": "Male", \n{"Gender": "Male", "HeightCm": 180, "WeightKg": 77}\n')
+        self.assertEqual(len(list(iter_ndjson_records(self.ndjson_file_src))), len(self.records) + 1)
+
+    def test_malformed_lines_are_counted(self):
+        with open(self.ndjson_file_src, 'a') as file:
+            file.write('{"Gender": "Male", \n')
+        with open(self.csv_file_src, 'a') as file:
+            file.write('Male,180,77,extra\r\n')
+
+        for data_file_src in [self.ndjson_file_src, self.csv_file_src]:
+            skipped_records = []
+            stats = ProcessingStats(on_skip=lambda reason, index, raw_data: skipped_records.append((reason, index)))
+            DataProcessor.process_data(data_file_src, stats=stats)
+            self.assertEqual(stats.records_read, len(self.records) + 1)
+            self.assertEqual(stats.skipped[SKIP_MALFORMED], 1)
+            self.assertIn((SKIP_MALFORMED, len(self.records)), skipped_records)
+
+            stats = ProcessingStats()
+            DataProcessor.process_many(data_file_src, workers=1, shard_bytes=30, stats=stats)
+            self.assertEqual(stats.skipped[SKIP_MALFORMED], 1, msg=data_file_src)
+
+    def test_split_lines(self):
+        for data_file_src in [self.ndjson_file_src, self.csv_file_src]:
+            with open(data_file_src, 'rb') as file:
+                raw_data = file.read()
+            for shard_bytes in [1, 30, 10 ** 9]:
+                shards = split_lines(data_file_src, shard_bytes)
+                self.assertEqual(b''.join(raw_data[start:end] for start, end in shards), raw_data)
+                self.assertTrue(all(raw_data[end - 1:end] == b'\n' for start, end in shards))
+
+            expected_list = DataProcessor.process_data(data_file_src)
+            for shard_bytes in [1, 30]:
+                self.assertListEqual(DataProcessor.process_many(data_file_src, workers=1, shard_bytes=shard_bytes),
+                                     expected_list)
@@ -0,0 +1,46 @@
+import os
+from unittest import TestCase
+from constants.bmi_units import BMIUnits, DEFAULT_CLASSIFIER, HealthRisk, ThresholdClassifier
+from main import DataProcessor
+from processing.results import ResultRow, ResultStore
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+
+
+class TestResultStore(TestCase):
+
+    def test_process_columnar_matches_process_data(self):
+        for file_name in ['data.json', 'data2.json', 'incomplete.json', 'corrupted.json']:
+            data_file_src = os.path.join(TEST_DATA_DIR, file_name)
+            result_store = DataProcessor.process_columnar(data_file_src)
+            expected_list = DataProcessor.process_data(data_file_src)
+            self.assertEqual(len(result_store), len(expected_list))
+            self.assertListEqual(result_store.to_dicts(), expected_list)
+
+    def test_rows(self):
+        result_store = DataProcessor.process_columnar(os.path.join(TEST_DATA_DIR, 'data2.json'))
+        rows = list(result_store)
+        self.assertEqual(rows[2], ResultRow('Male', 196, 125, 32.54, BMIUnits.MODERATELY_OBESE.value,
+                                            HealthRisk.MEDIUM.value))
+        self.assertListEqual(result_store.genders, ['Male', 'Female'])
+
+    def test_extend(self):
+        first_store, second_store = ResultStore(), ResultStore()
+        first_store.append('Male', 178, 75, 23.67, DEFAULT_CLASSIFIER.classify(23.67))
+        second_store.append('Female', 160.5, 90, 34.94, DEFAULT_CLASSIFIER.classify(34.94))
+        second_store.append('Male', 196, 125, 32.54, DEFAULT_CLASSIFIER.classify(32.54))
+
+        first_store.extend(second_store)
+        self.assertListEqual([row.gender for row in first_store], ['Male', 'Female', 'Male'])
+        self.assertEqual(first_store.to_dict(1)['HeightCm'], 160.5)
+        self.assertEqual(first_store.to_dict(2)['BMICategory'], 'Moderately obese')
+
+        with self.assertRaises(ValueError):
+            first_store.extend(ResultStore(ThresholdClassifier(category_labels=['a', 'b', 'c', 'd', 'e', 'f'])))
+
+    def test_many_genders(self):
+        result_store = ResultStore()
+        classification = DEFAULT_CLASSIFIER.classify(23.67)
+        for code in range(70000):
+            result_store.append(str(code), 178, 75, 23.67, classification)
+        self.assertEqual(result_store.to_dict(69999)['Gender'], '69999')
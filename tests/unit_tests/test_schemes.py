@@ -0,0 +1,56 @@
+import os
+from unittest import TestCase
+from main import DataProcessor
+from constants.bmi_units import BMIUnits, HealthRisk, ThresholdClassifier
+from constants.exceptions import SchemeValueError
+from constants.schemes import ASIAN_SCHEME, get_scheme, register_scheme, scheme_names, SchemeSet, WHO_SCHEME
+
+TWO_BANDS = ThresholdClassifier(thresholds=(30.0,), categories=(BMIUnits.NORMAL_WEIGHT, BMIUnits.MODERATELY_OBESE),
+                                risks=(HealthRisk.LOW, HealthRisk.MEDIUM), category_labels=('Not obese', 'Obese'),
+                                risk_labels=('Low', 'Raised'))
+register_scheme('two_bands', TWO_BANDS)
+
+
+class TestSchemes(TestCase):
+
+    def test_registry(self):
+        self.assertIn(WHO_SCHEME, scheme_names())
+        self.assertIs(get_scheme('two_bands'), TWO_BANDS)
+        self.assertRaises(SchemeValueError, get_scheme, 'unknown')
+        self.assertRaises(SchemeValueError, register_scheme, WHO_SCHEME, TWO_BANDS)
+
+    def test_asian_cut_off_points(self):
+        asian = get_scheme(ASIAN_SCHEME)
+        self.assertListEqual([asian.classify(bmi).category_text for bmi in [18.4, 18.5, 22.9, 23.0, 27.4, 27.5]],
+                             ['Underweight', 'Normal weight', 'Normal weight', 'Overweight', 'Overweight', 'Obese'])
+
+    def test_scheme_set(self):
+        scheme_set = SchemeSet([WHO_SCHEME, ASIAN_SCHEME])
+        self.assertListEqual([classification.category_text for classification in scheme_set.classify(24)],
+                             ['Normal weight', 'Overweight'])
+        person_data = {}
+        scheme_set.add_labels(person_data, 24)
+        self.assertDictEqual(person_data, {'BMICategory_who': 'Normal weight', 'HealthRisk_who': 'Low risk',
+                                           'BMICategory_asian': 'Overweight', 'HealthRisk_asian': 'Increased risk'})
+
+
+class TestProcessSchemes(TestCase):
+
+    def setUp(self) -> None:
+        self.data_file_src = os.path.join(os.path.dirname(__file__), '..', 'test_data', 'data2.json')
+
+    def test_process_data(self):
+        processed_data = DataProcessor.process_data(self.data_file_src, schemes=[ASIAN_SCHEME, 'two_bands'])
+        self.assertListEqual(processed_data, DataProcessor.process_many(self.data_file_src, workers=1, shard_bytes=100,
+                                                                        schemes=[ASIAN_SCHEME, 'two_bands']))
+        for person_data in processed_data:
+            self.assertEqual(person_data['BMICategory_asian'],
+                             get_scheme(ASIAN_SCHEME).classify(person_data['BMI']).category_text)
+            self.assertEqual(person_data['HealthRisk_two_bands'], TWO_BANDS.classify(person_data['BMI']).risk_text)
+        self.assertNotIn('BMICategory_asian', DataProcessor.process_data(self.data_file_src)[0])
+
+    def test_aggregate_schemes(self):
+        aggregations = DataProcessor.aggregate_schemes(self.data_file_src, [WHO_SCHEME, 'two_bands'])
+        self.assertEqual(aggregations[WHO_SCHEME], DataProcessor.aggregate(self.data_file_src))
+        self.assertEqual(aggregations['two_bands'].count(BMICategory=BMIUnits.MODERATELY_OBESE), 2)
+        self.assertEqual(aggregations['two_bands'].count(BMICategory=BMIUnits.NORMAL_WEIGHT), 4)
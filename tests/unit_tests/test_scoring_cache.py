@@ -0,0 +1,50 @@
+import os
+from unittest import TestCase
+from main import BMICalculator, DataProcessor
+from processing.scoring_cache import ScoringCache
+
+
+class TestScoringCache(TestCase):
+
+    def setUp(self) -> None:
+        self.bmi_calculator = BMICalculator(cache_size=0)
+
+    def test_matches_calculator(self):
+        scoring_cache = ScoringCache(self.bmi_calculator)
+        for mass_kg, height in [(75, 178), (55, 152), (125, 196), (75, 178), (62.5, 166.5)]:
+            bmi_value = self.bmi_calculator.calculate(mass_kg, height)
+            self.assertEqual(scoring_cache.score(mass_kg, height), (bmi_value, self.bmi_calculator.classify(bmi_value)))
+        self.assertEqual(scoring_cache.score(75, 1.78, in_cm=False, decimal_places=1)[0], 23.7)
+        self.assertEqual((scoring_cache.hits, scoring_cache.misses), (1, 5))
+        self.assertEqual(scoring_cache.hit_rate, 1 / 6)
+
+    def test_lru_eviction(self):
+        scoring_cache = ScoringCache(self.bmi_calculator, max_size=2)
+        scoring_cache.score(75, 178)
+        scoring_cache.score(55, 152)
+        scoring_cache.score(75, 178)
+        scoring_cache.score(125, 196)
+        self.assertEqual(len(scoring_cache), 2)
+        self.assertEqual(scoring_cache.evictions, 1)
+
+        # (55, 152) was the least recently used pair
+        scoring_cache.score(75, 178)
+        scoring_cache.score(55, 152)
+        self.assertEqual((scoring_cache.hits, scoring_cache.misses), (2, 4))
+
+        self.assertTrue(scoring_cache.evict(55, 152))
+        self.assertFalse(scoring_cache.evict(55, 152))
+        scoring_cache.clear()
+        self.assertEqual(len(scoring_cache), 0)
+        self.assertRaises(ValueError, ScoringCache, self.bmi_calculator, 0)
+
+    def test_process_data(self):
+        data_file_src = os.path.join(os.path.dirname(__file__), '..', 'test_data', 'data2.json')
+        bmi_calculator = BMICalculator()
+        expected_data = DataProcessor.process_columnar(data_file_src, self.bmi_calculator).to_dicts()
+
+        self.assertListEqual(DataProcessor.process_columnar(data_file_src, bmi_calculator).to_dicts(), expected_data)
+        self.assertListEqual(DataProcessor.process_columnar(data_file_src, bmi_calculator).to_dicts(), expected_data)
+        self.assertEqual(bmi_calculator.scoring_cache.misses, len(bmi_calculator.scoring_cache))
+        self.assertEqual(bmi_calculator.scoring_cache.hits + bmi_calculator.scoring_cache.misses, 2 * len(expected_data))
+        self.assertGreaterEqual(bmi_calculator.scoring_cache.hits, len(expected_data))
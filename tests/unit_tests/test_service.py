@@ -0,0 +1,68 @@
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase
+from main import BMICalculator
+from service import BMIService, MicroBatcher
+
+
+class TestBMIService(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.service = BMIService(MicroBatcher(max_batch_size=64, max_batch_delay=0.05), port=0)
+        await self.service.start()
+
+    async def asyncTearDown(self) -> None:
+        await self.service.stop()
+
+    async def _request(self, method: str, path: str, body: bytes = b'', keep_alive: bool = False):
+        reader, writer = await asyncio.open_connection(self.service.host, self.service.port)
+        connection = 'keep-alive' if keep_alive else 'close'
+        writer.write(f'{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: {connection}\r\n\r\n'
+                     .encode() + body)
+        status_line = await reader.readline()
+        headers = {}
+        while (line := await reader.readline()) != b'\r\n':
+            name, _, value = line.decode().partition(':')
+            headers[name.lower()] = value.strip()
+        response = json.loads(await reader.readexactly(int(headers['content-length'])))
+        writer.close()
+        return int(status_line.split()[1]), response
+
+    async def test_concurrent_requests_are_batched(self):
+        people = [(weight, height) for weight in range(40, 140, 5) for height in range(150, 200, 10)]
+        responses = await asyncio.gather(*[
+            self._request('POST', '/bmi', json.dumps({'WeightKg': weight, 'HeightCm': height}).encode())
+            for weight, height in people])
+
+        bmi_calculator = BMICalculator()
+        for (weight, height), (status, response) in zip(people, responses):
+            self.assertEqual(status, 200)
+            bmi_value = bmi_calculator.calculate(weight, height)
+            self.assertDictEqual(response, {'BMI': bmi_value, 'BMICategory': bmi_calculator.category(bmi_value),
+                                            'HealthRisk': bmi_calculator.health_risk(bmi_value)})
+
+        status, health = await self._request('GET', '/health')
+        self.assertEqual(health['scored'], len(people))
+        self.assertLess(health['batches'], len(people))
+
+    async def test_invalid_requests(self):
+        for body in [b'{', b'[]', b'{"WeightKg": 75}', b'{"WeightKg": 75, "HeightCm": "175"}',
+                     b'{"WeightKg": 75, "HeightCm": 0}', b'{"WeightKg": 75, "HeightCm": 1e-200}',
+                     b'{"WeightKg": 75, "HeightCm": Infinity}']:
+            status, response = await self._request('POST', '/bmi', body)
+            self.assertEqual(status, 400, msg=body)
+            self.assertIn('error', response)
+
+        self.assertEqual((await self._request('GET', '/bmi'))[0], 405)
+        self.assertEqual((await self._request('GET', '/unknown'))[0], 404)
+
+    async def test_backpressure(self):
+        batcher = MicroBatcher(max_batch_size=10, max_batch_delay=0.2, max_pending=2)
+        await batcher.start()
+        try:
+            results = await asyncio.gather(*[batcher.score(75, 178) for _ in range(10)], return_exceptions=True)
+        finally:
+            await batcher.stop()
+        rejected = [result for result in results if isinstance(result, Exception)]
+        self.assertGreater(len(rejected), 0)
+        self.assertEqual(batcher.scored_count, len(results) - len(rejected))
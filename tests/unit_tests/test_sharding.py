@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from processing.sharding import iter_input_files, split_json_array, ShardingError
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+
+
+class TestSplitJSONArray(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, raw_data: str) -> str:
+        data_file_src = os.path.join(self.temp_dir.name, 'data.json')
+        with open(data_file_src, 'w') as file:
+            file.write(raw_data)
+        return data_file_src
+
+    def test_shards_hold_whole_records(self):
+        data = [{'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96, 'Notes': 'a, "quoted" ] value'},
+                {'Gender': 'Female', 'Nested': {'Values': [1, 2, {'a': []}]}}, 5, 'text', [], {}] * 10
+        data_file_src = self._write(json.dumps(data, indent=4))
+
+        for shard_bytes in [1, 50, 500, 10 ** 9]:
+            with open(data_file_src, 'rb') as file:
+                raw_data = file.read()
+            shards = split_json_array(data_file_src, shard_bytes)
+            parsed_data = []
+            for start, end in shards:
+                parsed_data += json.loads(b'[' + raw_data[start:end] + b']')
+            self.assertListEqual(parsed_data, data)
+            if shard_bytes < 10 ** 9:
+                self.assertGreater(len(shards), 1)
+
+    def test_invalid_files(self):
+        for raw_data in ['', '{"Gender": "Male"}', '[{"Gender": "Male"}']:
+            with self.assertRaises(ShardingError):
+                split_json_array(self._write(raw_data), 1)
+
+    def test_iter_input_files(self):
+        data_files = list(iter_input_files([TEST_DATA_DIR, 'missing.json']))
+        self.assertListEqual([os.path.basename(data_file_src) for data_file_src in data_files],
+                             ['corrupted.json', 'data.json', 'data2.json', 'incomplete.json', 'missing.json'])
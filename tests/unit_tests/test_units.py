@@ -1,5 +1,6 @@
 from unittest import TestCase
 from constants.bmi_units import BMIUnits, bmi_level_to_text, HealthRisk, health_risk_to_text
+from constants.bmi_units import bmi_category_or_risk, DEFAULT_CLASSIFIER, ThresholdClassifier
 
 
 class TestBMIUnits(TestCase):
@@ -10,4 +11,36 @@ class TestBMIUnits(TestCase):
 
     def test_invalid_risk_text(self):
         with self.assertRaises(ValueError) as context:
-            health_risk_to_text(HealthRisk(6))
\ No newline at end of file
+            health_risk_to_text(HealthRisk(6))
+
+    def test_unknown_units_text(self):
+        with self.assertRaises(ValueError):
+            bmi_level_to_text(HealthRisk.LOW)
+        with self.assertRaises(ValueError):
+            health_risk_to_text(6)
+
+
+class TestThresholdClassifier(TestCase):
+
+    def test_default_classifier(self):
+        for bmi_value in [0.0, 18.39, 18.4, 24.99, 25.0, 29.99, 30.0, 34.99, 35.0, 39.99, 40.0, 75.0]:
+            classification = DEFAULT_CLASSIFIER.classify(bmi_value)
+            self.assertEqual(classification.category, bmi_category_or_risk(bmi_value, BMIUnits))
+            self.assertEqual(classification.risk, bmi_category_or_risk(bmi_value, HealthRisk))
+            self.assertEqual(classification.category_text, bmi_level_to_text(classification.category))
+            self.assertEqual(classification.risk_text, health_risk_to_text(classification.risk))
+
+    def test_custom_table(self):
+        classifier = ThresholdClassifier(thresholds=[18.5, 23.0],
+                                         categories=[BMIUnits.UNDERWEIGHT, BMIUnits.NORMAL_WEIGHT, BMIUnits.OVER_WEIGHT],
+                                         risks=[HealthRisk.MALNUTRITION, HealthRisk.LOW, HealthRisk.ENHANCED],
+                                         category_labels=['Low', 'Normal', 'High'])
+        self.assertEqual(classifier.classify(18.4).category, BMIUnits.UNDERWEIGHT)
+        self.assertEqual(classifier.classify(23.0).category_text, 'High')
+        self.assertEqual(classifier.classify(23.0).risk_text, 'Enhanced risk')
+
+    def test_invalid_table(self):
+        with self.assertRaises(ValueError):
+            ThresholdClassifier(thresholds=[25.0, 18.4, 30.0, 35.0, 40.0])
+        with self.assertRaises(ValueError):
+            ThresholdClassifier(thresholds=[18.4])
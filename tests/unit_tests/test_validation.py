@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from main import BMICalculator, DataProcessor
+from processing.metrics import ProcessingStats, SKIP_GENDER_TYPE, SKIP_HEIGHT_TYPE, SKIP_MISSING_KEY, SKIP_NOT_A_RECORD
+from processing.metrics import SKIP_NOT_FINITE, SKIP_OUT_OF_BOUNDS, SKIP_WEIGHT_TYPE, SKIP_ZERO_HEIGHT
+from processing.validation import FileErrorSink, ListErrorSink, RecordSchema
+
+
+class TestRecordSchema(TestCase):
+
+    def setUp(self) -> None:
+        self.validate = RecordSchema.from_calculator(BMICalculator()).compile()
+
+    def test_valid_records(self):
+        self.assertIsNone(self.validate({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96}))
+        self.assertIsNone(self.validate({'Gender': 'Male', 'HeightCm': 171.5, 'WeightKg': 62.5}))
+
+    def test_rejection_reasons(self):
+        self.assertEqual(self.validate([171, 96]), SKIP_NOT_A_RECORD)
+        self.assertEqual(self.validate({'HeightCm': 171, 'WeightKg': 96}), SKIP_MISSING_KEY)
+        self.assertEqual(self.validate({'Gender': 'Male', 'HeightCm': '171', 'WeightKg': 96}), SKIP_HEIGHT_TYPE)
+        self.assertEqual(self.validate({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': True}), SKIP_WEIGHT_TYPE)
+        self.assertEqual(self.validate({'Gender': 'Male', 'HeightCm': 0, 'WeightKg': 96}), SKIP_ZERO_HEIGHT)
+        self.assertEqual(self.validate({'Gender': 'Male', 'HeightCm': float('nan'), 'WeightKg': 96}), SKIP_NOT_FINITE)
+        self.assertEqual(self.validate({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': float('inf')}), SKIP_NOT_FINITE)
+        self.assertEqual(self.validate({'Gender': ['Male'], 'HeightCm': 171, 'WeightKg': 96}), SKIP_GENDER_TYPE)
+        self.assertEqual(self.validate({'Gender': None, 'HeightCm': 171, 'WeightKg': 96}), SKIP_GENDER_TYPE)
+        # the type of every field is checked before any value
+        self.assertEqual(self.validate({'Gender': 'Male', 'HeightCm': 0, 'WeightKg': None}), SKIP_WEIGHT_TYPE)
+
+    def test_reject_out_of_bounds(self):
+        bmi_calculator = BMICalculator()
+        bmi_calculator.min_height_m = 50
+        bmi_calculator.max_weight_kg = 300
+        validate = RecordSchema.from_calculator(bmi_calculator, reject_out_of_bounds=True).compile()
+        self.assertIsNone(validate({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96}))
+        self.assertEqual(validate({'Gender': 'Male', 'HeightCm': 30, 'WeightKg': 96}), SKIP_OUT_OF_BOUNDS)
+        self.assertEqual(validate({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 301}), SKIP_OUT_OF_BOUNDS)
+        # out of bounds records are scored as 0 unless the schema rejects them
+        self.assertIsNone(self.validate({'Gender': 'Male', 'HeightCm': -171, 'WeightKg': 96}))
+
+    def test_reject_out_of_bounds_gender(self):
+        validate = RecordSchema.from_calculator(BMICalculator(), reject_out_of_bounds=True).compile()
+        self.assertIsNone(validate({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96}))
+        # a gender is only required as a group key, requests scored without one do not need it
+        validate = RecordSchema.from_calculator(BMICalculator(), required_fields=('HeightCm', 'WeightKg')).compile()
+        self.assertIsNone(validate({'HeightCm': 171, 'WeightKg': 96}))
+
+    def test_custom_schema(self):
+        bmi_calculator = BMICalculator(schema=RecordSchema.from_calculator(BMICalculator(), numeric_types=(int,)))
+        self.assertEqual(bmi_calculator.validator({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 62.5}),
+                         SKIP_WEIGHT_TYPE)
+
+
+class TestErrorSinks(TestCase):
+    records = [{'Gender': 'Male', 'HeightCm': 171, 'WeightKg': 96},
+               {'Gender': 'Male', 'WeightKg': 85},
+               {'Gender': 'Female', 'HeightCm': 166, 'WeightKg': 62.5},
+               'Female',
+               {'Gender': 'Female', 'HeightCm': 0, 'WeightKg': 70}]
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file_src = os.path.join(self.temp_dir.name, 'data.json')
+        with open(self.data_file_src, 'w') as file:
+            json.dump(self.records, file)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_list_error_sink(self):
+        error_sink = ListErrorSink()
+        processed_data = DataProcessor.process_data(self.data_file_src, stats=ProcessingStats(on_skip=error_sink))
+        self.assertEqual(len(processed_data), 2)
+        self.assertListEqual([(rejected.index, rejected.reason) for rejected in error_sink.rejected],
+                             [(1, SKIP_MISSING_KEY), (3, SKIP_NOT_A_RECORD), (4, SKIP_ZERO_HEIGHT)])
+        self.assertListEqual(error_sink.records(), [self.records[1], self.records[3], self.records[4]])
+
+    def test_error_sink_with_shards(self):
+        data_dir = os.path.join(self.temp_dir.name, 'inputs')
+        os.mkdir(data_dir)
+        for file_name in ['a.json', 'b.ndjson']:
+            with open(os.path.join(data_dir, file_name), 'w') as file:
+                if file_name.endswith('.ndjson'):
+                    file.writelines(json.dumps(record) + '\n' for record in self.records)
+                else:
+                    json.dump(self.records, file)
+
+        # every shard indexes its records from 0, the hook sees the index within the file
+        expected_rejected = [(1, SKIP_MISSING_KEY), (3, SKIP_NOT_A_RECORD), (4, SKIP_ZERO_HEIGHT)] * 2
+        for workers in [1, 2]:
+            error_sink = ListErrorSink()
+            DataProcessor.process_many(data_dir, workers=workers, shard_bytes=1,
+                                       stats=ProcessingStats(on_skip=error_sink))
+            self.assertListEqual([(rejected.index, rejected.reason) for rejected in error_sink.rejected],
+                                 expected_rejected, msg=f'workers:{workers}')
+            self.assertListEqual(error_sink.records(), [self.records[1], self.records[3], self.records[4]] * 2)
+
+    def test_file_error_sink_replay(self):
+        error_file_src = os.path.join(self.temp_dir.name, 'errors.ndjson')
+        with FileErrorSink(error_file_src) as error_sink:
+            DataProcessor.process_data(self.data_file_src, stats=ProcessingStats(on_skip=error_sink))
+
+        with open(error_file_src) as file:
+            rejected = [json.loads(line) for line in file]
+        self.assertListEqual([(line['index'], line['reason']) for line in rejected],
+                             [(1, SKIP_MISSING_KEY), (3, SKIP_NOT_A_RECORD), (4, SKIP_ZERO_HEIGHT)])
+        self.assertListEqual([line['record'] for line in rejected], [self.records[1], self.records[3], self.records[4]])
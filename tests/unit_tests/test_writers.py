@@ -0,0 +1,188 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+from unittest import mock, TestCase
+from constants.schemes import scheme_names
+from main import DataProcessor, main, MAX_IN_FLIGHT_PER_WORKER
+from processing.readers import iter_csv_records, iter_ndjson_records
+from processing.sharding import iter_input_files
+from processing.writers import BufferedTextOutput, CSVWriter, open_writer, PartitionedWriter, RecordWriter
+
+
+class TestRecordWriters(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file_src = os.path.join(os.path.dirname(__file__), '..', 'test_data', 'data2.json')
+        self.expected_list = DataProcessor.process_data(self.data_file_src)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _output_src(self, file_name: str) -> str:
+        return os.path.join(self.temp_dir.name, file_name)
+
+    def test_json_array(self):
+        output_file_src = self._output_src('output.json')
+        written = DataProcessor.write_many(self.data_file_src, output_file_src, workers=1)
+        self.assertEqual(written, len(self.expected_list))
+        with open(output_file_src, encoding='utf-8') as file:
+            self.assertListEqual(json.load(file), self.expected_list)
+
+    def test_ndjson(self):
+        output_file_src = self._output_src('output.ndjson')
+        DataProcessor.write_many(self.data_file_src, output_file_src, workers=1)
+        self.assertListEqual(list(iter_ndjson_records(output_file_src)), self.expected_list)
+
+    def test_csv(self):
+        output_file_src = self._output_src('output.txt')
+        DataProcessor.write_many(self.data_file_src, output_file_src, 'csv', workers=1)
+        self.assertListEqual(list(iter_csv_records(output_file_src)), self.expected_list)
+
+    def test_bounded_in_flight(self):
+        data_file_src = self._output_src('data.ndjson')
+        with open(data_file_src, 'w') as file:
+            file.writelines(json.dumps({'Gender': 'Male', 'HeightCm': 171, 'WeightKg': weight}) + '\n'
+                            for weight in range(40, 80))
+
+        # every line is a shard of its own, count the shards submitted by the time each record is written
+        submitted = []
+        shard_tasks = DataProcessor._shard_tasks
+
+        def counted_shard_tasks(*args):
+            for task in shard_tasks(*args):
+                submitted.append(task)
+                yield task
+
+        def on_records(records):
+            for index, record in enumerate(records):
+                self.assertLessEqual(len(submitted) - index, MAX_IN_FLIGHT_PER_WORKER * 2 + 1)
+                yield record
+
+        with mock.patch.object(DataProcessor, '_shard_tasks', counted_shard_tasks):
+            written = DataProcessor.write_many(data_file_src, self._output_src('output.ndjson'), workers=2,
+                                               shard_bytes=1, on_records=on_records)
+        self.assertEqual(written, 40)
+        self.assertEqual(len(submitted), 40)
+
+    def test_empty_output(self):
+        output_file_src = self._output_src('output.json')
+        with open_writer(output_file_src):
+            pass
+        with open(output_file_src) as file:
+            self.assertListEqual(json.load(file), [])
+
+        output_file_src = self._output_src('output.csv')
+        with CSVWriter(output_file_src, fieldnames=['Gender', 'BMI']):
+            pass
+        with open(output_file_src) as file:
+            self.assertEqual(file.read(), 'Gender,BMI\n')
+
+    def test_abstract_writer(self):
+        with self.assertRaises(TypeError):
+            RecordWriter(self._output_src('output.txt'), file=io.StringIO())
+
+    def test_buffered_output(self):
+        file = io.StringIO()
+        output = BufferedTextOutput(file, buffer_size=10)
+        output.write('12345')
+        self.assertEqual(file.getvalue(), '')
+        output.write('67890')
+        self.assertEqual(file.getvalue(), '1234567890')
+        output.write('x')
+        output.flush()
+        self.assertEqual(file.getvalue(), '1234567890x')
+
+    def test_cli(self):
+        output_file_src = self._output_src('output.ndjson')
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main([self.data_file_src, '--output', output_file_src, '--workers', '1',
+                  '--target', 'NORMAL_WEIGHT', '--target', 'SEVERELY_OBESE'])
+        self.assertListEqual(list(iter_ndjson_records(output_file_src)), self.expected_list)
+        self.assertListEqual(stdout.getvalue().splitlines(),
+                             [f'6 record(s) written to {output_file_src}',
+                              '4 person(s) are classified as being Normal weight',
+                              '1 person(s) are classified as being Severely obese'])
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main([self.data_file_src, '--target', 'NORMAL_WEIGHT'])
+        self.assertEqual(stdout.getvalue(), '4 person(s) are classified as being Normal weight\n')
+
+        for option in [['--partition-by', 'Gender'], ['--scheme', scheme_names()[0]], ['--output-format', 'csv']]:
+            with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+                main([self.data_file_src] + option)
+            self.assertIn(f'{option[0]} requires --output', stderr.getvalue())
+
+
+class TestPartitionedWriter(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.temp_dir.name, 'partitions')
+        self.data_file_src = os.path.join(os.path.dirname(__file__), '..', 'test_data', 'data2.json')
+        self.expected_list = DataProcessor.process_data(self.data_file_src)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_write_partitioned(self):
+        counts = DataProcessor.write_partitioned(self.data_file_src, self.output_dir, workers=1)
+        self.assertEqual(sum(counts.values()), len(self.expected_list))
+
+        for output_file_src, count in counts.items():
+            records = list(iter_ndjson_records(output_file_src))
+            self.assertEqual(len(records), count)
+            self.assertEqual(len({(record['BMICategory'], record['Gender']) for record in records}), 1)
+        female_normal = [record for record in self.expected_list
+                         if record['Gender'] == 'Female' and record['BMICategory'] == 'Normal weight']
+        self.assertListEqual(
+            list(iter_ndjson_records(os.path.join(self.output_dir, 'BMICategory-1_Gender-Female.ndjson'))),
+            female_normal)
+
+    def test_open_file_limit(self):
+        records = [{'Gender': 'Female', 'Group': index % 5, 'Index': index} for index in range(100)]
+        with PartitionedWriter(self.output_dir, ('Group',), 'csv', buffer_size=10, max_open_files=2) as writer:
+            for record in records:
+                writer.write(record)
+                self.assertLessEqual(writer.open_files, 2)
+        self.assertEqual(writer.open_files, 0)
+
+        output_file_srcs = list(iter_input_files(self.output_dir, ('.csv',)))
+        self.assertEqual(len(output_file_srcs), 5)
+        written_records = [record for output_file_src in output_file_srcs
+                           for record in iter_csv_records(output_file_src)]
+        self.assertListEqual(sorted(written_records, key=lambda record: record['Index']), records)
+
+    def test_json_partitions(self):
+        with PartitionedWriter(self.output_dir, ('Gender',), 'json', max_open_files=1) as writer:
+            writer.write_all(self.expected_list)
+        with open(os.path.join(self.output_dir, 'Gender-Male.json')) as file:
+            self.assertListEqual(json.load(file), [record for record in self.expected_list
+                                                   if record['Gender'] == 'Male'])
+
+    def test_distinct_file_names(self):
+        records = [{'Gender': 'Fe male'}, {'Gender': 'Fe-male'}, {'Gender': 'Fe_male'}, {'Gender': 'Fe%20male'}]
+        with PartitionedWriter(self.output_dir, ('Gender',)) as writer:
+            writer.write_all(records)
+        self.assertListEqual([os.path.basename(output_file_src) for output_file_src in writer.counts()],
+                             ['Gender-Fe%20male.ndjson', 'Gender-Fe-male.ndjson', 'Gender-Fe%5Fmale.ndjson',
+                              'Gender-Fe%2520male.ndjson'])
+        for record, output_file_src in zip(records, writer.counts()):
+            self.assertListEqual(list(iter_ndjson_records(output_file_src)), [record])
+
+        with PartitionedWriter(self.output_dir, ('Gender',), value_names={'Gender': {'F': 'Female'}}) as writer:
+            writer.write({'Gender': 'F'})
+            self.assertRaises(ValueError, writer.write, {'Gender': 'Female'})
+
+    def test_gender_must_be_a_string(self):
+        data_file_src = os.path.join(self.temp_dir.name, 'data.json')
+        with open(data_file_src, 'w') as file:
+            json.dump([{'Gender': ['Male'], 'HeightCm': 171, 'WeightKg': 96},
+                       {'Gender': None, 'HeightCm': 171, 'WeightKg': 96},
+                       {'Gender': 'None', 'HeightCm': 171, 'WeightKg': 96}], file)
+        counts = DataProcessor.write_partitioned(data_file_src, self.output_dir, partition_by=('Gender',), workers=1)
+        self.assertDictEqual(counts, {os.path.join(self.output_dir, 'Gender-None.ndjson'): 1})